@@ -0,0 +1,97 @@
+# batch_analyzer.py
+import asyncio
+import time
+
+_DONE = object()
+
+
+def _error_fields(exc: Exception) -> dict:
+    # HTTPException carries status_code/detail; anything else is a 500.
+    return {
+        "status_code": getattr(exc, "status_code", 500),
+        "error": getattr(exc, "detail", None) or str(exc) or type(exc).__name__,
+    }
+
+
+async def _iterate(source):
+    if hasattr(source, "__aiter__"):
+        async for item in source:
+            yield item
+    else:
+        for item in source:
+            yield item
+
+
+async def stream_batch(source, analyze, canonicalize, concurrency: int = 4, queue_size: int = 8,
+                       dedupe: bool = True):
+    """Analyze URLs from ``source`` with bounded concurrency, yielding one dict per URL as it finishes.
+
+    ``source`` is any iterable or async iterable of URLs and ``analyze`` an
+    async callable returning the fields to report for one URL. ``canonicalize``
+    maps a URL to its dedupe key and raises for invalid input; a URL whose
+    canonical form was already seen is reported as a duplicate rather than
+    analyzed again; ``dedupe=False`` skips that bookkeeping so memory stays
+    flat on unbounded sources. Failures are yielded inline with their status code.
+
+    Both queues are bounded, so a consumer that stops reading stalls the
+    workers, which in turn stop pulling from ``source``. A final dict with a
+    ``summary`` key reports the totals.
+    """
+    pending = asyncio.Queue(maxsize=queue_size)
+    results = asyncio.Queue(maxsize=queue_size)
+    summary = {"total": 0, "ok": 0, "errors": 0, "duplicates": 0}
+    started = time.perf_counter()
+
+    async def produce():
+        seen = {}
+        index = 0
+        try:
+            async for url in _iterate(source):
+                summary["total"] += 1
+                try:
+                    canonical = canonicalize(url)
+                except Exception as e:
+                    await results.put({"index": index, "url": url, "status": "error", **_error_fields(e)})
+                else:
+                    if dedupe and canonical in seen:
+                        await results.put({"index": index, "url": url, "status": "duplicate",
+                                           "duplicate_of": seen[canonical]})
+                    else:
+                        if dedupe:
+                            seen[canonical] = index
+                        await pending.put((index, url, canonical))
+                index += 1
+        except Exception as e:
+            # Report a failing source instead of passing a short batch off as complete.
+            summary["source_error"] = str(e) or type(e).__name__
+        for _ in range(concurrency):
+            await pending.put(_DONE)
+
+    async def work():
+        while (job := await pending.get()) is not _DONE:
+            index, url, canonical = job
+            try:
+                line = {"index": index, "url": url, "status": "ok", **await analyze(canonical)}
+            except Exception as e:
+                line = {"index": index, "url": url, "status": "error", **_error_fields(e)}
+            await results.put(line)
+        await results.put(_DONE)
+
+    tasks = [asyncio.create_task(produce())]
+    tasks += [asyncio.create_task(work()) for _ in range(concurrency)]
+    try:
+        running = concurrency
+        while running:
+            line = await results.get()
+            if line is _DONE:
+                running -= 1
+                continue
+            status = line["status"]
+            summary["duplicates" if status == "duplicate" else "ok" if status == "ok" else "errors"] += 1
+            yield line
+        summary["elapsed_ms"] = round((time.perf_counter() - started) * 1000)
+        yield {"summary": summary}
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
@@ -0,0 +1,23 @@
+# _stub_server.py
+"""Local aiohttp server the benchmarks stand in for remote services with."""
+import socket
+
+from aiohttp import web
+
+
+async def start_stub_server(add_routes) -> tuple:
+    """Serve an app on a free 127.0.0.1 port; returns ``(runner, "http://127.0.0.1:<port>")``.
+
+    ``add_routes`` is called with the app's router. The socket is bound here,
+    so the port is known without reaching into the started site.
+    """
+    app = web.Application()
+    add_routes(app.router)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind(("127.0.0.1", 0))
+    site = web.SockSite(runner, sock)
+    await site.start()
+    return runner, f"http://127.0.0.1:{sock.getsockname()[1]}"
@@ -0,0 +1,94 @@
+# bench_event_loop.py
+"""Regression benchmark: /pagespeed latency while /analyze calls are running.
+
+The browser scrape is replaced with a blocking sleep and PageSpeed/OpenAI
+with instant stubs, so the only thing measured is whether slow browser work
+stalls the event loop. Run from backend/:
+
+    python -m benchmarks.bench_event_loop --analyze 4 --scrape-seconds 2
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+import main
+
+
+async def measure_pagespeed(client, samples: int, interval: float, busy):
+    """Sample /pagespeed until ``samples`` are taken and the background load is done.
+
+    Latency is measured from each request's scheduled send time, so time the
+    event loop spends blocked before the request goes out is counted too.
+    """
+    latencies = []
+    origin = time.perf_counter()
+    while len(latencies) < samples or not all(task.done() for task in busy):
+        scheduled = origin + len(latencies) * interval
+        await asyncio.sleep(max(0.0, scheduled - time.perf_counter()))
+        response = await client.get("/pagespeed", params={"url": "https://example.com"})
+        response.raise_for_status()
+        latencies.append((time.perf_counter() - scheduled) * 1000)
+    return latencies
+
+
+async def run_scenario(name: str, analyze_calls: int, samples: int, interval: float):
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        async def analyze(i):
+            await asyncio.sleep(interval * i)
+            # URLs unique per scenario, or the analyze cache answers them all
+            response = await client.get("/analyze", params={"url": f"https://example.com/{name}/{i}"})
+            response.raise_for_status()
+
+        busy = [asyncio.create_task(analyze(i)) for i in range(analyze_calls)]
+        latencies = await measure_pagespeed(client, samples, interval, busy)
+        await asyncio.gather(*busy)
+    return latencies
+
+
+def report(label: str, latencies):
+    print(f"{label:<28} p50={statistics.median(latencies):8.1f} ms  "
+          f"max={max(latencies):8.1f} ms  n={len(latencies)}")
+
+
+async def bench(args):
+    def slow_scrape(url, report=None, on_head=None):
+        time.sleep(args.scrape_seconds)
+        return {"title": "Bench", "meta_tags": [{"name": "description", "content": "x"}]}
+
+    async def fake_openai(*_args, **_kwargs):
+        return {"performance_score": 50}
+
+    async def fake_pagespeed(*_args, **_kwargs):
+        return {"lighthouseResult": {}}
+
+    main.scrape_all_meta_tags = slow_scrape
+    main.STATIC_FAST_PATH = False
+    main.app.state.openai_client = object()  # never called, the OpenAI call is stubbed
+    main.app.state.pagespeed_session = None
+    main.analyze_meta_tags_with_openai = fake_openai
+    main.run_pagespeed = fake_pagespeed
+    main.browser_executor = main.BrowserExecutor(max_workers=args.analyze, max_queue=args.analyze)
+
+    report("idle", await run_scenario("idle", 0, args.samples, args.interval))
+    report(f"executor, {args.analyze} x /analyze", await run_scenario("executor", args.analyze, args.samples, args.interval))
+
+    class InlineExecutor:
+        """The pre-executor behaviour: scrape directly on the event loop."""
+        async def run(self, fn, *fn_args):
+            return fn(*fn_args)
+
+    main.browser_executor = InlineExecutor()
+    report(f"inline, {args.analyze} x /analyze", await run_scenario("inline", args.analyze, args.samples, args.interval))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--analyze", type=int, default=4, help="concurrent /analyze calls")
+    parser.add_argument("--scrape-seconds", type=float, default=1.0, help="simulated browser time per page")
+    parser.add_argument("--samples", type=int, default=10, help="/pagespeed requests per scenario")
+    parser.add_argument("--interval", type=float, default=0.1, help="pause between /pagespeed requests")
+    asyncio.run(bench(parser.parse_args()))
@@ -0,0 +1,106 @@
+# bench_meta_extraction.py
+"""Microbenchmark: per-element get_attribute loop vs one execute_script call.
+
+Serves a page with N meta tags from a local HTTP server, loads it in headless
+Chrome and times both extraction strategies, counting WebDriver commands
+(each one is an HTTP round trip to chromedriver). Needs Chrome installed.
+Run from backend/:
+
+    python -m benchmarks.bench_meta_extraction --tags 80 --repeat 5
+"""
+import argparse
+import statistics
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from selenium.webdriver.common.by import By
+
+from browser_pool import create_driver
+from meta_extractor import extract_meta
+
+
+def build_page(tags: int) -> bytes:
+    metas = "\n".join(
+        f'<meta name="bench-{i}" content="value {i}">' if i % 2 else
+        f'<meta property="og:bench-{i}" content="value {i}">'
+        for i in range(tags)
+    )
+    return f"<html><head><title>Bench</title>{metas}</head><body></body></html>".encode()
+
+
+def legacy_extract(driver) -> dict:
+    """The original loop from scrape_all_meta_tags, kept for comparison."""
+    title = driver.title
+    meta_tags = []
+    for meta in driver.find_elements(By.TAG_NAME, "meta"):
+        tag_info = {
+            "name": meta.get_attribute("name"),
+            "property": meta.get_attribute("property"),
+            "content": meta.get_attribute("content"),
+            "charset": meta.get_attribute("charset"),
+            "http_equiv": meta.get_attribute("http-equiv")
+        }
+        if any(tag_info.values()):
+            meta_tags.append(tag_info)
+    return {"title": title, "meta_tags": meta_tags}
+
+
+def count_round_trips(driver):
+    """Wrap the driver's command executor and return a callable reading the count."""
+    executor = driver.command_executor
+    original = executor.execute
+    calls = [0]
+
+    def execute(command, params):
+        calls[0] += 1
+        return original(command, params)
+
+    executor.execute = execute
+    return lambda: calls[0]
+
+
+def main(args):
+    page = build_page(args.tags)
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html")
+            self.send_header("Content-Length", str(len(page)))
+            self.end_headers()
+            self.wfile.write(page)
+
+        def log_message(self, *_args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/"
+
+    driver = create_driver()
+    try:
+        driver.get(url)
+        round_trips = count_round_trips(driver)
+        results = {}
+        for label, extract in (("get_attribute loop", legacy_extract), ("execute_script", extract_meta)):
+            timings = []
+            before = round_trips()
+            for _ in range(args.repeat):
+                started = time.perf_counter()
+                results[label] = extract(driver)
+                timings.append((time.perf_counter() - started) * 1000)
+            trips = (round_trips() - before) / args.repeat
+            print(f"{label:<20} round trips/page={trips:6.0f}  "
+                  f"wall p50={statistics.median(timings):8.1f} ms")
+        assert results["get_attribute loop"] == results["execute_script"], "outputs differ"
+    finally:
+        driver.quit()
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tags", type=int, default=80, help="meta tags on the fixture page")
+    parser.add_argument("--repeat", type=int, default=5, help="extractions per strategy")
+    main(parser.parse_args())
@@ -0,0 +1,97 @@
+# bench_openai_client.py
+"""Per-call latency of analyze_meta_tags_with_openai: new client per call vs shared client.
+
+Runs against a local OpenAI-compatible stub, so the numbers isolate client
+construction and connection setup; against api.openai.com every new client
+additionally pays DNS and a TLS handshake. Run from backend/:
+
+    python -m benchmarks.bench_openai_client --calls 200 --concurrency 10
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+from aiohttp import web
+from openai import AsyncOpenAI
+
+from benchmarks._stub_server import start_stub_server
+from seo_analyzer import analyze_meta_tags_with_openai, create_openai_client
+
+ANALYSIS = {
+    "performance_score": 72,
+    "weaknesses": ["Missing og:image"],
+    "improvements": {"title": "Better title", "standard": [], "opengraph": [], "twitter": []},
+    "preview_analysis": {"expected_sharing_appearance": "", "critical_missing_tags": []},
+}
+CATEGORIZED = {"standard": [{"name": "description", "content": "x"}], "opengraph": [], "twitter": [], "other": []}
+
+
+async def start_stub(latency_ms: float):
+    async def completions(_request):
+        await asyncio.sleep(latency_ms / 1000)
+        return web.json_response({
+            "id": "chatcmpl-bench",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": "gpt-4-turbo-preview",
+            "choices": [{
+                "index": 0,
+                "finish_reason": "stop",
+                "message": {"role": "assistant", "content": json.dumps(ANALYSIS)},
+            }],
+            "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+        })
+
+    runner, base_url = await start_stub_server(lambda router: router.add_post("/v1/chat/completions", completions))
+    return runner, f"{base_url}/v1"
+
+
+async def drive(label: str, make_call, calls: int, concurrency: int):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one():
+        async with semaphore:
+            started = time.perf_counter()
+            await make_call()
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(calls)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    print(f"{label:<18} p50={statistics.median(latencies):7.2f} ms  "
+          f"p95={latencies[int(len(latencies) * 0.95) - 1]:7.2f} ms  {calls / elapsed:8.1f} calls/s")
+
+
+async def bench(args):
+    runner, base_url = await start_stub(args.latency_ms)
+    try:
+        async def per_call_client():
+            client = AsyncOpenAI(api_key="bench", base_url=base_url)
+            try:
+                await analyze_meta_tags_with_openai("https://example.com", "Title", CATEGORIZED, client=client)
+            finally:
+                await client.close()
+
+        shared = create_openai_client("bench", max_connections=args.concurrency)
+        shared.base_url = base_url
+
+        async def shared_client():
+            await analyze_meta_tags_with_openai("https://example.com", "Title", CATEGORIZED, client=shared)
+
+        await drive("client per call", per_call_client, args.calls, args.concurrency)
+        await drive("shared client", shared_client, args.calls, args.concurrency)
+        await shared.close()
+    finally:
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--latency-ms", type=float, default=5.0, help="simulated model latency")
+    asyncio.run(bench(parser.parse_args()))
@@ -0,0 +1,72 @@
+# bench_pagespeed_session.py
+"""Throughput of run_pagespeed: session per request vs the shared app session.
+
+Runs against a local stand-in for the PageSpeed endpoint over plain HTTP, so
+the gap shown is connector and TCP setup only; against googleapis.com each
+new session also pays DNS and a TLS handshake. Run from backend/:
+
+    python -m benchmarks.bench_pagespeed_session --requests 1000 --concurrency 64
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from aiohttp import web
+
+from benchmarks._stub_server import start_stub_server
+from pagespeed_checker import create_pagespeed_session, run_pagespeed
+
+REPORT = {"lighthouseResult": {"categories": {"performance": {"score": 0.9}}, "audits": {}}}
+
+
+async def start_stand_in(latency_ms: float):
+    async def run_pagespeed_handler(_request):
+        await asyncio.sleep(latency_ms / 1000)
+        return web.json_response(REPORT)
+
+    runner, base_url = await start_stub_server(
+        lambda router: router.add_get("/pagespeedonline/v5/runPagespeed", run_pagespeed_handler))
+    return runner, f"{base_url}/pagespeedonline/v5/runPagespeed"
+
+
+async def drive(label: str, call, requests: int, concurrency: int):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(i):
+        async with semaphore:
+            started = time.perf_counter()
+            await call(f"https://example.com/{i}")
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    elapsed = time.perf_counter() - started
+    print(f"{label:<20} {requests / elapsed:8.1f} req/s  p50={statistics.median(latencies):7.2f} ms")
+
+
+async def bench(args):
+    runner, endpoint = await start_stand_in(args.latency_ms)
+    try:
+        await drive("session per request",
+                    lambda url: run_pagespeed(url, "bench", endpoint=endpoint),
+                    args.requests, args.concurrency)
+
+        session = create_pagespeed_session(limit_per_host=args.concurrency)
+        try:
+            await drive("shared session",
+                        lambda url: run_pagespeed(url, "bench", session=session, endpoint=endpoint),
+                        args.requests, args.concurrency)
+        finally:
+            await session.close()
+    finally:
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="simulated PageSpeed latency")
+    asyncio.run(bench(parser.parse_args()))
@@ -0,0 +1,89 @@
+# bench_static_path.py
+"""Throughput of the static HTTP fast path vs the Chrome path on a local fixture.
+
+Serves a server-rendered page from a local aiohttp server and pushes the same
+number of pages through fetch_static_meta and through the browser pool.
+The browser half is skipped when Chrome cannot be started. Run from backend/:
+
+    python -m benchmarks.bench_static_path --pages 200 --concurrency 20
+"""
+import argparse
+import asyncio
+import time
+
+import aiohttp
+from aiohttp import web
+
+from benchmarks._stub_server import start_stub_server
+from browser_executor import BrowserExecutor
+from browser_pool import BrowserPool
+from static_fetcher import fetch_static_meta
+import main
+
+FIXTURE = """<!doctype html>
+<html><head>
+<title>Fixture page</title>
+<meta charset="utf-8">
+<meta name="description" content="A server-rendered fixture page">
+<meta property="og:title" content="Fixture page">
+<meta property="og:description" content="A server-rendered fixture page">
+<meta name="twitter:card" content="summary">
+</head><body>{body}</body></html>"""
+
+
+async def start_fixture_server(body_kb: int):
+    page = FIXTURE.format(body="<p>filler</p>" * (body_kb * 1024 // 13))
+
+    async def handler(_request):
+        return web.Response(text=page, content_type="text/html")
+
+    return await start_stub_server(lambda router: router.add_get("/{tail:.*}", handler))
+
+
+async def drive(label: str, scrape, base_url: str, pages: int, concurrency: int):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i):
+        async with semaphore:
+            return await scrape(f"{base_url}/page/{i}")
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(one(i) for i in range(pages)))
+    elapsed = time.perf_counter() - started
+    print(f"{label:<8} {pages} pages in {elapsed:7.2f} s  -> {pages / elapsed:8.1f} pages/s")
+    return results
+
+
+async def bench(args):
+    runner, base_url = await start_fixture_server(args.body_kb)
+    try:
+        async with aiohttp.ClientSession(auto_decompress=False) as session:
+            await drive("static", lambda url: fetch_static_meta(session, url), base_url,
+                        args.pages, args.concurrency)
+
+        pool = BrowserPool(size=args.browsers)
+        pool.start()
+        if pool.stats()["failed_starts"]:
+            print("browser  skipped: Chrome could not be started")
+            return
+        main.browser_pool = pool
+        executor = BrowserExecutor(max_workers=args.browsers, max_queue=args.pages)
+        try:
+            browser_pages = min(args.pages, args.browser_pages)
+            await drive("browser", lambda url: executor.run(main.scrape_all_meta_tags, url), base_url,
+                        browser_pages, args.concurrency)
+        finally:
+            executor.shutdown()
+            pool.close()
+    finally:
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, default=200, help="pages through the static path")
+    parser.add_argument("--browser-pages", type=int, default=20, help="pages through the browser path")
+    parser.add_argument("--concurrency", type=int, default=20, help="in-flight pages")
+    parser.add_argument("--browsers", type=int, default=2, help="Chrome drivers in the pool")
+    parser.add_argument("--body-kb", type=int, default=50, help="size of the fixture page body")
+    asyncio.run(bench(parser.parse_args()))
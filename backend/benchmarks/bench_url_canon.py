@@ -0,0 +1,94 @@
+# bench_url_canon.py
+"""Checks the canonicalizer's fast path against the full parser and times both.
+
+Every URL in the corpus must canonicalize identically through the fast path
+and the full parser, and canonicalizing twice must change nothing. The
+corpus is generated (a mix of already-canonical URLs and messy variants) or
+read one URL per line from --corpus. Run from backend/:
+
+    python -m benchmarks.bench_url_canon --urls 200000
+"""
+import argparse
+import random
+import sys
+import time
+
+from url_canon import UrlCanonicalizer
+
+HOSTS = ["example.com", "www.example.org", "shop.example.co.uk", "a-b.example.net", "bücher.de", "xn--bcher-kva.de",
+         "münchen.example", "localhost", "127.0.0.1", "[::1]"]
+SEGMENTS = ["", "blog", "2024", "post-1", "a.b", "~user", ".well-known", ".", "..", "caf%C3%A9", "%7euser", "a%2fb",
+            "with space", "ünï", "index.html", "UPPER", "x_y"]
+PARAMS = ["q", "page", "utm_source", "utm_medium", "gclid", "fbclid", "ref", "id", "sort", "a", "b", "_ga"]
+FRAGMENTS = ["", "", "", "#top", "#", "#/route?x=1"]
+
+
+def messy_url(rng: random.Random) -> str:
+    scheme = rng.choice(["http", "https", "HTTPS", "Http"])
+    host = rng.choice(HOSTS)
+    if rng.random() < 0.3:
+        host = host.upper()
+    port = rng.choice(["", "", "", ":80", ":443", ":8080"])
+    path = "/".join(rng.choice(SEGMENTS) for _ in range(rng.randint(0, 4)))
+    if path or rng.random() < 0.5:
+        path = "/" + path
+    query = ""
+    if rng.random() < 0.4:
+        query = "?" + "&".join(f"{rng.choice(PARAMS)}={rng.choice(['1', 'x', '', 'a+b', '%20'])}"
+                               for _ in range(rng.randint(1, 4)))
+    return f"{scheme}://{host}{port}{path}{query}{rng.choice(FRAGMENTS)}"
+
+
+def canonical_url(rng: random.Random) -> str:
+    host = rng.choice(HOSTS[:4])
+    path = "/".join(rng.choice(["blog", "2024", "post-1", "index.html", "a_b", "~u"]) for _ in range(rng.randint(0, 4)))
+    return f"https://{host}/{path}"
+
+
+def build_corpus(size: int, seed: int) -> list:
+    rng = random.Random(seed)
+    return [canonical_url(rng) if rng.random() < 0.6 else messy_url(rng) for _ in range(size)]
+
+
+def timed(fn, corpus) -> float:
+    started = time.perf_counter()
+    for url in corpus:
+        fn(url)
+    return time.perf_counter() - started
+
+
+def main(args):
+    if args.corpus:
+        with open(args.corpus, encoding="utf-8") as f:
+            corpus = [line.strip() for line in f if line.strip()]
+    else:
+        corpus = build_corpus(args.urls, args.seed)
+
+    canonicalizer = UrlCanonicalizer()
+    mismatches = 0
+    fast_hits = 0
+    for url in corpus:
+        expected = canonicalizer._canonicalize_slow(url)
+        got = canonicalizer.canonicalize(url)
+        fast_hits += got is url or got == url + "/" and url.count("/") == 2
+        if got != expected or canonicalizer.canonicalize(got) != got:
+            mismatches += 1
+            if mismatches <= 10:
+                print(f"MISMATCH {url!r}: fast={got!r} full={expected!r}")
+
+    full = timed(canonicalizer._canonicalize_slow, corpus)
+    fast = timed(canonicalizer.canonicalize, corpus)
+    print(f"{len(corpus)} urls, {len(set(map(canonicalizer.canonicalize, corpus)))} distinct canonical, "
+          f"{fast_hits / len(corpus):.0%} on the fast path")
+    print(f"full parser {len(corpus) / full:10.0f} urls/s")
+    print(f"canonicalize {len(corpus) / fast:10.0f} urls/s")
+    print(f"{mismatches} mismatches")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--urls", type=int, default=200000, help="size of the generated corpus")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--corpus", help="file with one URL per line instead of a generated corpus")
+    sys.exit(main(parser.parse_args()))
@@ -0,0 +1,76 @@
+# browser_executor.py
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class ExecutorBusy(Exception):
+    """Raised when both the worker threads and the wait queue are full."""
+
+
+class BrowserExecutor:
+    """Runs blocking browser work on dedicated threads, off the event loop.
+
+    At most ``max_workers`` calls run at once and at most ``max_queue`` more
+    may wait for a thread; anything beyond that is rejected immediately
+    instead of piling up behind slow pages.
+    """
+
+    def __init__(self, max_workers: int = 2, max_queue: int = 8):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="browser")
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._running = 0
+        self._stats = {
+            "submitted": 0,
+            "completed": 0,
+            "failed": 0,
+            "rejected": 0,
+        }
+
+    async def run(self, fn, *args):
+        """Run ``fn(*args)`` on a browser thread and await its result."""
+        with self._lock:
+            if self._pending >= self.max_workers + self.max_queue:
+                self._stats["rejected"] += 1
+                raise ExecutorBusy("Browser queue is full")
+            self._pending += 1
+            self._stats["submitted"] += 1
+
+        # The counter is released from the worker thread, not when the awaiting
+        # request goes away, so cancelled requests still count until their
+        # browser work has actually stopped.
+        future = self._executor.submit(self._call, fn, args)
+        future.add_done_callback(self._finished)
+        return await asyncio.wrap_future(future)
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["running"] = self._running
+            stats["queued"] = self._pending - self._running
+        stats["max_workers"] = self.max_workers
+        stats["max_queue"] = self.max_queue
+        return stats
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _call(self, fn, args):
+        with self._lock:
+            self._running += 1
+        try:
+            return fn(*args)
+        finally:
+            with self._lock:
+                self._running -= 1
+
+    def _finished(self, future):
+        with self._lock:
+            self._pending -= 1
+            if future.cancelled() or future.exception() is not None:
+                self._stats["failed"] += 1
+            else:
+                self._stats["completed"] += 1
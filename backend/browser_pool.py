@@ -0,0 +1,255 @@
+# browser_pool.py
+import logging
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
+from selenium import webdriver
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.chrome.options import Options as ChromeOptions
+from selenium.webdriver.chrome.service import Service as ChromeService
+
+logger = logging.getLogger(__name__)
+
+
+class PoolTimeout(Exception):
+    """Raised when no browser becomes free within the queue timeout."""
+
+
+def build_chrome_options(page_load_strategy: str = "normal", capture_network: bool = False) -> ChromeOptions:
+    """Headless Chrome options shared by every pooled driver."""
+    chrome_options = ChromeOptions()
+    chrome_options.add_argument("--headless")
+    chrome_options.add_argument("--no-sandbox")
+    chrome_options.add_argument("--disable-gpu")
+    chrome_options.add_argument("--disable-dev-shm-usage")
+    chrome_options.page_load_strategy = page_load_strategy
+    if capture_network:
+        # Network events end up in driver.get_log("performance") for counting.
+        chrome_options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+    return chrome_options
+
+
+def create_driver(page_load_strategy: str = "normal", resource_policy=None,
+                  driver_path: str = None, browser_path: str = None):
+    """Launch a new headless Chrome driver, optionally blocking unneeded resources.
+
+    Pass the paths resolved at startup; without them Selenium Manager looks
+    chromedriver up again for every driver.
+    """
+    options = build_chrome_options(page_load_strategy, capture_network=resource_policy is not None)
+    if browser_path:
+        options.binary_location = browser_path
+    driver = webdriver.Chrome(service=ChromeService(executable_path=driver_path), options=options)
+    if resource_policy is not None:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": resource_policy.blocked_url_patterns()})
+    return driver
+
+
+def _process_tree_rss_mb(pid: int):
+    """Resident memory of a process and its descendants in MB, or None if unknown.
+
+    Reads /proc directly so no extra dependency is needed; returns None on
+    platforms without it.
+    """
+    if not os.path.isdir("/proc"):
+        return None
+    total_kb = 0
+    pending = [pid]
+    while pending:
+        current = pending.pop()
+        try:
+            with open(f"/proc/{current}/status") as status:
+                for line in status:
+                    if line.startswith("VmRSS:"):
+                        total_kb += int(line.split()[1])
+                        break
+            for tid in os.listdir(f"/proc/{current}/task"):
+                with open(f"/proc/{current}/task/{tid}/children") as children:
+                    pending.extend(int(child) for child in children.read().split())
+        except (OSError, ValueError):
+            continue
+    return total_kb / 1024
+
+
+class _Slot:
+    def __init__(self, driver):
+        self.driver = driver
+        self.pages = 0
+
+
+class BrowserPool:
+    """Fixed-size pool of warm Chrome drivers leased out one request at a time.
+
+    Drivers are reset between uses, recycled after ``max_pages`` page loads or
+    once their process tree exceeds ``max_rss_mb``, and replaced when they crash.
+    Replacements are launched on a background thread so the request that
+    returned the driver is not charged for the Chrome start-up.
+    """
+
+    def __init__(self, size: int = 2, queue_timeout: float = 30.0, max_pages: int = 50,
+                 max_rss_mb: float = None, driver_factory=create_driver):
+        self.size = size
+        self.queue_timeout = queue_timeout
+        self.max_pages = max_pages
+        self.max_rss_mb = max_rss_mb
+        self._driver_factory = driver_factory
+        # A None entry stands for a slot whose driver still has to be launched.
+        self._idle = queue.Queue()
+        self._lock = threading.Lock()
+        self._closed = False
+        self._stats = {
+            "leases": 0,
+            "waits": 0,
+            "timeouts": 0,
+            "recycles": 0,
+            "crashes": 0,
+            "failed_starts": 0,
+            "wait_seconds_total": 0.0,
+        }
+
+    def start(self):
+        """Launch all drivers up front so the first requests find them warm."""
+        for _ in range(self.size):
+            try:
+                self._idle.put(_Slot(self._driver_factory()))
+            except Exception:
+                logger.exception("Failed to start pooled Chrome driver")
+                self._bump("failed_starts")
+                self._idle.put(None)
+
+    def close(self):
+        self._closed = True
+        while True:
+            try:
+                slot = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            if slot is not None:
+                self._quit(slot.driver)
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+        stats["size"] = self.size
+        stats["idle"] = self._idle.qsize()
+        return stats
+
+    @contextmanager
+    def lease(self):
+        """Borrow a driver for the duration of the ``with`` block."""
+        slot = self._acquire()
+        crashed = False
+        try:
+            yield slot.driver
+        except WebDriverException:
+            crashed = not self._is_alive(slot.driver)
+            raise
+        finally:
+            slot.pages += 1
+            self._release(slot, crashed)
+
+    def _acquire(self) -> _Slot:
+        try:
+            slot = self._idle.get_nowait()
+        except queue.Empty:
+            self._bump("waits")
+            started = time.monotonic()
+            try:
+                slot = self._idle.get(timeout=self.queue_timeout)
+            except queue.Empty:
+                self._bump("timeouts")
+                raise PoolTimeout(f"No browser available within {self.queue_timeout}s")
+            finally:
+                self._bump("wait_seconds_total", time.monotonic() - started)
+
+        if slot is None:
+            try:
+                slot = _Slot(self._driver_factory())
+            except Exception:
+                self._bump("failed_starts")
+                self._idle.put(None)
+                raise
+        self._bump("leases")
+        return slot
+
+    def _release(self, slot: _Slot, crashed: bool):
+        if self._closed:
+            self._quit(slot.driver)
+            return
+        if crashed:
+            self._bump("crashes")
+            self._replace(slot)
+            return
+        if slot.pages >= self.max_pages or self._over_rss_limit(slot.driver):
+            self._bump("recycles")
+            self._replace(slot)
+            return
+        try:
+            self._reset(slot.driver)
+        except WebDriverException:
+            self._bump("crashes")
+            self._replace(slot)
+            return
+        self._idle.put(slot)
+
+    def _replace(self, slot: _Slot):
+        def relaunch():
+            self._quit(slot.driver)
+            try:
+                replacement = _Slot(self._driver_factory())
+            except Exception:
+                logger.exception("Failed to relaunch pooled Chrome driver")
+                self._bump("failed_starts")
+                self._idle.put(None)
+                return
+            if self._closed:
+                self._quit(replacement.driver)
+            else:
+                self._idle.put(replacement)
+
+        threading.Thread(target=relaunch, name="browser-pool-relaunch", daemon=True).start()
+
+    def _reset(self, driver):
+        """Drop per-site state so the next lease starts from a clean browser."""
+        handles = driver.window_handles
+        for handle in handles[1:]:
+            driver.switch_to.window(handle)
+            driver.close()
+        driver.switch_to.window(handles[0])
+        origin = driver.execute_script("return window.location.origin")
+        if origin and origin != "null":
+            driver.execute_cdp_cmd("Storage.clearDataForOrigin", {"origin": origin, "storageTypes": "all"})
+        driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+        driver.get("about:blank")
+
+    def _over_rss_limit(self, driver) -> bool:
+        if not self.max_rss_mb:
+            return False
+        try:
+            rss = _process_tree_rss_mb(driver.service.process.pid)
+        except AttributeError:
+            return False
+        return rss is not None and rss > self.max_rss_mb
+
+    @staticmethod
+    def _is_alive(driver) -> bool:
+        try:
+            driver.current_url
+            return True
+        except Exception:
+            return False
+
+    @staticmethod
+    def _quit(driver):
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+    def _bump(self, key: str, amount=1):
+        with self._lock:
+            self._stats[key] += amount
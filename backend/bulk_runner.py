@@ -0,0 +1,203 @@
+# bulk_runner.py
+"""Resumable bulk analysis of a URL list, one URL per line, streamed to NDJSON.
+
+Every finished line number is appended to a checkpoint log, so rerunning the
+same command after a crash or deploy skips URLs that already have a result.
+URLs that ended in a retryable error (a transient 503, say) are logged as
+failed and tried again on the next run; a 4xx such as an invalid URL is final. Results are written before their checkpoint
+entry: a URL in flight at the moment of a crash is analyzed again on resume,
+never lost. Only the browsers and HTTP clients are started, not the job
+runner, so a bulk run can share jobs.db with a live server. Run from backend/:
+
+    python bulk_runner.py urls.txt --out results.ndjson
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+import main
+from batch_analyzer import stream_batch
+
+
+# Client errors that can succeed on a later run; any other 4xx is permanent.
+RETRYABLE_CLIENT_ERRORS = {408, 429}
+
+
+def is_final(result: dict) -> bool:
+    """Whether a result line needs no retry: ok, or a client error that would fail the same way again."""
+    if result["status"] == "ok":
+        return True
+    status_code = result.get("status_code", 500)
+    return 400 <= status_code < 500 and status_code not in RETRYABLE_CLIENT_ERRORS
+
+
+class Checkpoint:
+    """Append-only log of finished input line numbers, held in memory as a watermark.
+
+    Every line below ``watermark`` is finished; ``_ahead`` holds the few
+    finished lines past it. Results complete only slightly out of order, so
+    ``_ahead`` stays as small as the number of URLs in flight no matter how
+    long the input is. Lines that finished with a retryable error still
+    move the watermark but are kept in ``_failed``, and are not done until a
+    later run marks them final; see ``is_final``.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.watermark = 0
+        self._ahead = set()
+        self._failed = set()
+        self._log = None
+
+    def open(self):
+        """Load and compact any existing log, then reopen it for appending."""
+        if os.path.exists(self.path):
+            with open(self.path, encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if line.startswith("w "):
+                        self._advance_to(int(line[2:]))
+                    elif line.startswith("e "):
+                        self._add(int(line[2:]), final=False)
+                    elif line:
+                        self._add(int(line))
+            tmp = self.path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(f"w {self.watermark}\n")
+                f.writelines(f"{n}\n" for n in sorted(self._ahead))
+                f.writelines(f"e {n}\n" for n in sorted(self._failed))
+            os.replace(tmp, self.path)
+        self._log = open(self.path, "a", encoding="utf-8")
+
+    def close(self):
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+
+    def is_done(self, line_no: int) -> bool:
+        if line_no in self._failed:
+            return False
+        return line_no < self.watermark or line_no in self._ahead
+
+    def mark(self, line_no: int, final: bool = True):
+        self._log.write(f"{line_no}\n" if final else f"e {line_no}\n")
+        self._log.flush()
+        self._add(line_no, final)
+
+    def _add(self, line_no: int, final: bool = True):
+        if final:
+            self._failed.discard(line_no)
+        else:
+            self._failed.add(line_no)
+        if line_no >= self.watermark:
+            self._ahead.add(line_no)
+            self._advance_to(self.watermark)
+
+    def _advance_to(self, watermark: int):
+        self.watermark = max(self.watermark, watermark)
+        self._ahead = {n for n in self._ahead if n >= self.watermark}
+        while self.watermark in self._ahead:
+            self._ahead.discard(self.watermark)
+            self.watermark += 1
+
+
+class Progress:
+    def __init__(self, total: int, every: float):
+        self.total = total
+        self.done = 0
+        self.errors = 0
+        self.every = every
+        self._started = time.monotonic()
+        self._processed = 0
+        self._last_report = self._started
+
+    def record(self, ok: bool):
+        self.done += 1
+        self._processed += 1
+        self.errors += not ok
+        now = time.monotonic()
+        if now - self._last_report >= self.every:
+            self._last_report = now
+            self.report(now)
+
+    def report(self, now: float = None):
+        elapsed = (now or time.monotonic()) - self._started
+        rate = self._processed / elapsed if elapsed else 0.0
+        line = f"{self.done}/{self.total} done, {self.errors} errors, {rate:.2f} urls/s"
+        if rate and self.total > self.done:
+            line += f", ETA {format_duration((self.total - self.done) / rate)}"
+        print(line, file=sys.stderr, flush=True)
+
+
+def format_duration(seconds: float) -> str:
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}h{minutes:02d}m{seconds:02d}s" if hours else f"{minutes}m{seconds:02d}s"
+
+
+def count_urls(path: str) -> int:
+    with open(path, encoding="utf-8") as f:
+        return sum(1 for line in f if line.strip() and not line.startswith("#"))
+
+
+async def run(args):
+    checkpoint = Checkpoint(args.checkpoint or args.out + ".checkpoint")
+    checkpoint.open()
+    total = count_urls(args.input)
+    progress = Progress(total, args.progress_every)
+    # Batch index -> input line number for the URLs currently in flight.
+    line_numbers = {}
+
+    def pending_urls():
+        batch_index = 0
+        with open(args.input, encoding="utf-8") as f:
+            for line_no, line in enumerate(f):
+                url = line.strip()
+                is_url = bool(url) and not url.startswith("#")
+                if checkpoint.is_done(line_no):
+                    progress.done += is_url
+                    continue
+                if not is_url:
+                    # Logged too, or the watermark would stall on this line.
+                    checkpoint.mark(line_no)
+                    continue
+                line_numbers[batch_index] = line_no
+                batch_index += 1
+                yield url
+
+    try:
+        with open(args.out, "a", encoding="utf-8") as out:
+            async with main.analysis_resources(main.app):
+                async for result in stream_batch(
+                    pending_urls(),
+                    main.analyze_cached,
+                    main.batch_key,
+                    concurrency=args.concurrency,
+                    queue_size=args.concurrency * 2,
+                    dedupe=False,
+                ):
+                    if "summary" in result:
+                        if "source_error" in result["summary"]:
+                            print(f"Reading {args.input} failed: {result['summary']['source_error']}", file=sys.stderr)
+                        continue
+                    line_no = line_numbers.pop(result.pop("index"))
+                    out.write(json.dumps({"line": line_no, **result}) + "\n")
+                    out.flush()
+                    checkpoint.mark(line_no, is_final(result))
+                    progress.record(result["status"] == "ok")
+    finally:
+        checkpoint.close()
+        progress.report()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("input", help="text file with one URL per line; # starts a comment")
+    parser.add_argument("--out", required=True, help="NDJSON file results are appended to")
+    parser.add_argument("--checkpoint", help="checkpoint log (default: <out>.checkpoint)")
+    parser.add_argument("--concurrency", type=int, default=main.BATCH_CONCURRENCY)
+    parser.add_argument("--progress-every", type=float, default=10.0, help="seconds between progress lines")
+    asyncio.run(run(parser.parse_args()))
@@ -0,0 +1,367 @@
+# cdp_backend.py
+import asyncio
+import itertools
+import json
+import logging
+import re
+import shutil
+import tempfile
+import time
+
+import aiohttp
+
+from meta_extractor import EXTRACT_META_EXPRESSION, build_meta_result, quiet_head_expression
+from resource_blocking import new_network_counters, record_blocked
+
+logger = logging.getLogger(__name__)
+
+DEVTOOLS_LINE = re.compile(r"DevTools listening on (ws://\S+)")
+
+# Page event that ends navigation for each WebDriver-style pageLoadStrategy
+LOAD_EVENTS = {
+    "normal": "Page.loadEventFired",
+    "eager": "Page.domContentEventFired",
+    "none": None,
+}
+
+
+def _elapsed_ms(started: float) -> int:
+    return round((time.perf_counter() - started) * 1000)
+
+
+class CDPError(Exception):
+    """Raised when Chrome reports an error for a DevTools command."""
+
+
+class CDPConnection:
+    """One DevTools websocket carrying commands for the browser and all its tabs.
+
+    Tabs are driven through flattened sessions, so every page shares this
+    socket and a single reader task on the event loop.
+    """
+
+    def __init__(self, ws: aiohttp.ClientWebSocketResponse):
+        self._ws = ws
+        self._ids = itertools.count(1)
+        self._pending = {}
+        self._listeners = {}
+        self._subscribers = {}
+        self._reader = asyncio.create_task(self._read())
+
+    @property
+    def closed(self) -> bool:
+        return self._ws.closed or self._reader.done()
+
+    async def send(self, method: str, params: dict = None, session_id: str = None) -> dict:
+        message_id = next(self._ids)
+        message = {"id": message_id, "method": method, "params": params or {}}
+        if session_id:
+            message["sessionId"] = session_id
+        future = asyncio.get_running_loop().create_future()
+        self._pending[message_id] = future
+        try:
+            await self._ws.send_str(json.dumps(message))
+            return await future
+        finally:
+            self._pending.pop(message_id, None)
+
+    def expect(self, method: str, session_id: str = None) -> asyncio.Future:
+        """Future for the next ``method`` event; register it before triggering the event."""
+        key = (session_id, method)
+        future = asyncio.get_running_loop().create_future()
+        self._listeners.setdefault(key, []).append(future)
+        future.add_done_callback(lambda done: self._forget(key, done))
+        return future
+
+    def _forget(self, key, future):
+        listeners = self._listeners.get(key)
+        if listeners and future in listeners:
+            listeners.remove(future)
+            if not listeners:
+                del self._listeners[key]
+
+    def subscribe(self, method: str, session_id: str, callback):
+        """Call ``callback(params)`` for every ``method`` event until unsubscribed.
+
+        Callbacks run on the reader task and must not await; schedule a task
+        for any follow-up commands.
+        """
+        self._subscribers.setdefault((session_id, method), []).append(callback)
+
+    def unsubscribe(self, session_id: str):
+        for key in [key for key in self._subscribers if key[0] == session_id]:
+            del self._subscribers[key]
+
+    async def close(self):
+        await self._ws.close()
+        self._reader.cancel()
+
+    async def _read(self):
+        try:
+            async for msg in self._ws:
+                if msg.type != aiohttp.WSMsgType.TEXT:
+                    continue
+                data = json.loads(msg.data)
+                if "id" in data:
+                    future = self._pending.get(data["id"])
+                    if future and not future.done():
+                        if "error" in data:
+                            future.set_exception(CDPError(data["error"].get("message", "CDP error")))
+                        else:
+                            future.set_result(data.get("result", {}))
+                    continue
+                key = (data.get("sessionId"), data.get("method"))
+                for callback in self._subscribers.get(key, []):
+                    callback(data.get("params", {}))
+                for future in list(self._listeners.get(key, [])):
+                    if not future.done():
+                        future.set_result(data.get("params", {}))
+        finally:
+            error = ConnectionError("DevTools connection closed")
+            waiting = list(self._pending.values()) + [f for fs in self._listeners.values() for f in fs]
+            for future in waiting:
+                if not future.done():
+                    future.set_exception(error)
+
+
+class _ChromeProcess:
+    def __init__(self, process, connection, session, profile_dir, stderr_drain):
+        self.process = process
+        self.connection = connection
+        self.session = session
+        self.profile_dir = profile_dir
+        self.stderr_drain = stderr_drain
+        self.active = 0
+
+    @property
+    def alive(self) -> bool:
+        return self.process.returncode is None and not self.connection.closed
+
+    async def close(self):
+        try:
+            await self.connection.send("Browser.close")
+        except Exception:
+            pass
+        await self.connection.close()
+        await self.session.close()
+        if self.process.returncode is None:
+            self.process.kill()
+        await self.process.wait()
+        self.stderr_drain.cancel()
+        shutil.rmtree(self.profile_dir, ignore_errors=True)
+
+
+class CDPBrowser:
+    """Scrapes pages in isolated browser contexts of a few long-lived Chrome processes.
+
+    Every job gets its own browser context (separate cookies and storage) and
+    tab, so dozens of pages load at once without a WebDriver or a thread per
+    page. Returns the same ``{"title", "meta_tags"}`` contract as
+    scrape_all_meta_tags.
+    """
+
+    def __init__(self, processes: int = 1, max_pages: int = 24, page_timeout: float = 15.0,
+                 chrome_binary: str = None, page_load_strategy: str = "normal", resource_policy=None,
+                 head_quiet_ms: int = 300, head_ready_timeout: float = 5.0):
+        self.processes = processes
+        self.page_timeout = page_timeout
+        self.head_quiet_ms = head_quiet_ms
+        self.head_ready_timeout = head_ready_timeout
+        self.load_event = LOAD_EVENTS[page_load_strategy]
+        self.resource_policy = resource_policy
+        self.chrome_binary = chrome_binary
+        self._pages = asyncio.Semaphore(max_pages)
+        self._chromes = []
+        self._launch_lock = asyncio.Lock()
+        self._stats = {"pages": 0, "failures": 0, "chrome_restarts": 0}
+
+    async def start(self):
+        if not self.chrome_binary:
+            raise RuntimeError("CDPBrowser needs chrome_binary; resolve it with chrome_setup.resolve_chrome")
+        for _ in range(self.processes):
+            self._chromes.append(await self._launch())
+
+    async def close(self):
+        chromes, self._chromes = self._chromes, []
+        await asyncio.gather(*(chrome.close() for chrome in chromes), return_exceptions=True)
+
+    def stats(self) -> dict:
+        stats = dict(self._stats)
+        stats["processes"] = len(self._chromes)
+        stats["active_pages"] = sum(chrome.active for chrome in self._chromes)
+        return stats
+
+    async def scrape(self, url: str, report: dict = None, on_head=None) -> dict:
+        """Title and meta tags of ``url``; network counters are added to ``report``.
+
+        ``on_head`` is called with the settled head before the browser context is disposed.
+        """
+        async with self._pages:
+            chrome = await self._pick()
+            chrome.active += 1
+            try:
+                scraped = await asyncio.wait_for(self._scrape_in_context(chrome.connection, url, report, on_head),
+                                                 self.page_timeout)
+            except Exception:
+                self._stats["failures"] += 1
+                raise
+            finally:
+                chrome.active -= 1
+            self._stats["pages"] += 1
+            return scraped
+
+    async def _scrape_in_context(self, connection: CDPConnection, url: str, report: dict = None,
+                                 on_head=None) -> dict:
+        timings = {}
+        phase = time.perf_counter()
+        context = await connection.send("Target.createBrowserContext", {"disposeOnDetach": True})
+        context_id = context["browserContextId"]
+        session_id = None
+        try:
+            target = await connection.send("Target.createTarget", {
+                "url": "about:blank",
+                "browserContextId": context_id,
+            })
+            attached = await connection.send("Target.attachToTarget", {
+                "targetId": target["targetId"],
+                "flatten": True,
+            })
+            session_id = attached["sessionId"]
+            await connection.send("Page.enable", session_id=session_id)
+            if self.resource_policy is not None:
+                await self._block_resources(connection, session_id, url, report)
+
+            loaded = connection.expect(self.load_event, session_id) if self.load_event else None
+            navigation = await connection.send("Page.navigate", {"url": url}, session_id)
+            if navigation.get("errorText"):
+                if loaded:
+                    loaded.cancel()
+                raise CDPError(f"Navigation failed: {navigation['errorText']}")
+            if loaded:
+                await loaded
+            timings["navigate_ms"] = _elapsed_ms(phase)
+
+            phase = time.perf_counter()
+            readiness = await connection.send("Runtime.evaluate", {
+                "expression": quiet_head_expression(self.head_quiet_ms, self.head_ready_timeout * 1000),
+                "awaitPromise": True,
+                "returnByValue": True,
+            }, session_id)
+            timings["ready_ms"] = _elapsed_ms(phase)
+
+            phase = time.perf_counter()
+            evaluated = await connection.send("Runtime.evaluate", {
+                "expression": EXTRACT_META_EXPRESSION,
+                "returnByValue": True,
+            }, session_id)
+            if "exceptionDetails" in evaluated:
+                raise CDPError("Meta extraction script failed")
+            timings["extract_ms"] = _elapsed_ms(phase)
+            if report is not None:
+                report.setdefault("timings", {}).update(timings)
+                report["readiness"] = readiness.get("result", {}).get("value")
+            scraped = build_meta_result(evaluated["result"]["value"])
+            if on_head is not None:
+                on_head(scraped)
+            return scraped
+        finally:
+            if session_id:
+                connection.unsubscribe(session_id)
+            try:
+                await connection.send("Target.disposeBrowserContext", {"browserContextId": context_id})
+            except (CDPError, ConnectionError):
+                pass
+
+    async def _block_resources(self, connection: CDPConnection, session_id: str, page_url: str, report: dict):
+        """Intercept every request of the tab and fail the ones the policy rejects."""
+        counters = new_network_counters()
+        if report is not None:
+            report["network"] = counters
+
+        async def answer(params):
+            request_id = params["requestId"]
+            resource_type = params.get("resourceType", "Other")
+            try:
+                if self.resource_policy.blocks(resource_type, params["request"]["url"], page_url):
+                    record_blocked(counters, resource_type)
+                    await connection.send("Fetch.failRequest", {
+                        "requestId": request_id,
+                        "errorReason": "BlockedByClient",
+                    }, session_id)
+                else:
+                    await connection.send("Fetch.continueRequest", {"requestId": request_id}, session_id)
+            except (CDPError, ConnectionError):
+                # The context may already be gone once the scrape has finished.
+                pass
+
+        answering = set()
+
+        def on_paused(params):
+            task = asyncio.create_task(answer(params))
+            answering.add(task)
+            task.add_done_callback(answering.discard)
+
+        def on_finished(params):
+            counters["bytes_transferred"] += int(params.get("encodedDataLength", 0))
+
+        connection.subscribe("Fetch.requestPaused", session_id, on_paused)
+        connection.subscribe("Network.loadingFinished", session_id, on_finished)
+        await connection.send("Network.enable", session_id=session_id)
+        await connection.send("Fetch.enable", {"patterns": [{"urlPattern": "*", "requestStage": "Request"}]},
+                              session_id)
+
+    async def _pick(self) -> _ChromeProcess:
+        async with self._launch_lock:
+            for index, chrome in enumerate(self._chromes):
+                if not chrome.alive:
+                    logger.warning("Chrome process %s died, relaunching", chrome.process.pid)
+                    self._stats["chrome_restarts"] += 1
+                    await chrome.close()
+                    self._chromes[index] = await self._launch()
+            if not self._chromes:
+                self._chromes.append(await self._launch())
+        return min(self._chromes, key=lambda chrome: chrome.active)
+
+    async def _launch(self) -> _ChromeProcess:
+        profile_dir = tempfile.mkdtemp(prefix="optiscrape-cdp-")
+        process = await asyncio.create_subprocess_exec(
+            self.chrome_binary,
+            "--headless=new",
+            "--no-sandbox",
+            "--disable-gpu",
+            "--disable-dev-shm-usage",
+            "--no-first-run",
+            "--no-default-browser-check",
+            "--remote-debugging-port=0",
+            f"--user-data-dir={profile_dir}",
+            "about:blank",
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        try:
+            ws_url = await asyncio.wait_for(self._devtools_url(process), 30)
+        except Exception:
+            process.kill()
+            await process.wait()
+            shutil.rmtree(profile_dir, ignore_errors=True)
+            raise
+        # Keep draining stderr so Chrome never blocks on a full pipe.
+        stderr_drain = asyncio.create_task(self._drain(process.stderr))
+        session = aiohttp.ClientSession()
+        ws = await session.ws_connect(ws_url, max_msg_size=64 * 1024 * 1024)
+        return _ChromeProcess(process, CDPConnection(ws), session, profile_dir, stderr_drain)
+
+    @staticmethod
+    async def _devtools_url(process) -> str:
+        while True:
+            line = await process.stderr.readline()
+            if not line:
+                raise RuntimeError("Chrome exited before DevTools was ready")
+            match = DEVTOOLS_LINE.search(line.decode(errors="replace"))
+            if match:
+                return match.group(1)
+
+    @staticmethod
+    async def _drain(stream):
+        while await stream.read(64 * 1024):
+            pass
@@ -0,0 +1,67 @@
+# chrome_setup.py
+import logging
+import os
+import shutil
+import subprocess
+import time
+
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.common.selenium_manager import SeleniumManager
+
+logger = logging.getLogger(__name__)
+
+CHROME_NAMES = ("google-chrome", "google-chrome-stable", "chromium", "chromium-browser", "chrome")
+
+
+class ChromeSetupError(RuntimeError):
+    """Raised at startup when Chrome or chromedriver cannot be used."""
+
+
+def _check_executable(label: str, path: str, env_var: str):
+    if not path or not os.path.isfile(path) or not os.access(path, os.X_OK):
+        raise ChromeSetupError(f"{label} not found or not executable at {path!r}; set {env_var}")
+
+
+def _driver_version(driver_path: str) -> str:
+    try:
+        completed = subprocess.run([driver_path, "--version"], capture_output=True, text=True, timeout=10)
+    except (OSError, subprocess.TimeoutExpired) as e:
+        raise ChromeSetupError(f"chromedriver at {driver_path!r} does not run: {e}")
+    if completed.returncode != 0:
+        raise ChromeSetupError(f"chromedriver at {driver_path!r} failed: {completed.stderr.strip()}")
+    return completed.stdout.strip()
+
+
+def resolve_chrome(driver_path: str = None, browser_path: str = None, need_driver: bool = True) -> dict:
+    """Locate Chrome (and chromedriver) once and check that they run.
+
+    Configured paths win. Anything missing is found on PATH or, for the
+    Selenium backend, through Selenium Manager, which may download a driver.
+    Doing this at startup keeps that work out of every request and makes a
+    broken install fail before the app starts serving.
+    """
+    started = time.perf_counter()
+    if not browser_path:
+        browser_path = next(filter(None, (shutil.which(name) for name in CHROME_NAMES)), None)
+    if need_driver and not driver_path:
+        args = ["--browser", "chrome"]
+        if browser_path:
+            args += ["--browser-path", browser_path]
+        try:
+            output = SeleniumManager().binary_paths(args)
+        except WebDriverException as e:
+            raise ChromeSetupError(f"Selenium Manager could not resolve chromedriver: {e.msg}; "
+                                   f"set CHROMEDRIVER_PATH and CHROME_BINARY")
+        driver_path = output["driver_path"]
+        browser_path = browser_path or output["browser_path"]
+
+    _check_executable("Chrome", browser_path, "CHROME_BINARY")
+    paths = {"browser_path": browser_path, "driver_path": None, "driver_version": None}
+    if need_driver:
+        _check_executable("chromedriver", driver_path, "CHROMEDRIVER_PATH")
+        paths["driver_path"] = driver_path
+        paths["driver_version"] = _driver_version(driver_path)
+    paths["resolve_ms"] = round((time.perf_counter() - started) * 1000)
+    logger.info("Using Chrome at %s, chromedriver at %s (%s ms)",
+                browser_path, paths["driver_path"], paths["resolve_ms"])
+    return paths
@@ -0,0 +1,64 @@
+# crawl_state.py
+import asyncio
+import time
+
+from sqlite_store import SQLiteStore
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    url TEXT PRIMARY KEY,
+    lastmod TEXT,
+    etag TEXT,
+    last_modified TEXT,
+    head_hash TEXT,
+    checked_at REAL NOT NULL,
+    changed_at REAL
+);
+"""
+
+
+class CrawlState(SQLiteStore):
+    """What the previous crawl saw of each page, so unchanged pages can be skipped.
+
+    Per URL it keeps the sitemap ``lastmod``, the ETag/Last-Modified
+    validators for conditional GETs and the hash of the extracted <head>.
+    Queries run in a worker thread like JobStore's.
+    """
+
+    schema = SCHEMA
+
+    async def get(self, url: str):
+        return await asyncio.to_thread(self._get, url)
+
+    async def record(self, url: str, lastmod: str = None, validators: dict = None, head_hash: str = None):
+        """Store what this crawl saw; ``head_hash`` is given only when the head was re-read.
+
+        ``changed_at`` moves only when the hash differs from the stored one.
+        """
+        await asyncio.to_thread(self._record, url, lastmod, validators or {}, head_hash)
+
+    def _get(self, url: str):
+        with self._lock:
+            row = self._db.execute("SELECT * FROM pages WHERE url = ?", (url,)).fetchone()
+        return dict(row) if row else None
+
+    def _record(self, url: str, lastmod, validators: dict, head_hash):
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                """
+                INSERT INTO pages (url, lastmod, etag, last_modified, head_hash, checked_at, changed_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (url) DO UPDATE SET
+                    lastmod = COALESCE(excluded.lastmod, lastmod),
+                    etag = COALESCE(excluded.etag, etag),
+                    last_modified = COALESCE(excluded.last_modified, last_modified),
+                    changed_at = CASE WHEN excluded.head_hash IS NOT NULL
+                                       AND excluded.head_hash IS NOT head_hash
+                                      THEN excluded.checked_at ELSE changed_at END,
+                    head_hash = COALESCE(excluded.head_hash, head_hash),
+                    checked_at = excluded.checked_at
+                """,
+                (url, lastmod, validators.get("etag"), validators.get("last_modified"), head_hash, now,
+                 now if head_hash else None),
+            )
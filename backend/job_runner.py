@@ -0,0 +1,93 @@
+# job_runner.py
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class JobRunner:
+    """Background workers that drain a JobStore, plus a periodic purge of expired results.
+
+    ``run(url, progress)`` does the work for one job; it may await
+    ``progress(stage)`` to publish how far it got. Workers wake as soon as a
+    job is submitted and otherwise re-check the store every
+    ``poll_interval`` seconds. Jobs interrupted by a restart are requeued on
+    ``start``.
+    """
+
+    def __init__(self, store, run, workers: int = 2, retention: float = 7 * 86400,
+                 purge_interval: float = 3600.0, poll_interval: float = 5.0):
+        self.store = store
+        self._run = run
+        self.workers = workers
+        self.retention = retention
+        self.purge_interval = purge_interval
+        self.poll_interval = poll_interval
+        self._wakeup = asyncio.Event()
+        self._tasks = []
+        self._stats = {"completed": 0, "failed": 0, "requeued": 0, "purged": 0}
+
+    async def start(self):
+        self._stats["requeued"] += await self.store.requeue_running()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        if self.retention:
+            self._tasks.append(asyncio.create_task(self._purge_loop()))
+        self._wakeup.set()
+
+    async def close(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def notify(self):
+        """Wake idle workers after a job was queued."""
+        self._wakeup.set()
+
+    async def stats(self) -> dict:
+        stats = dict(self._stats)
+        stats["workers"] = self.workers
+        stats["jobs"] = await self.store.counts()
+        return stats
+
+    async def _worker(self):
+        while True:
+            # Clear before looking so a job queued mid-claim still wakes us.
+            self._wakeup.clear()
+            job = await self.store.claim_next()
+            if job is None:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            # Another idle worker may find more queued jobs.
+            self._wakeup.set()
+            await self._execute(job)
+
+    async def _execute(self, job: dict):
+        job_id = job["id"]
+
+        async def progress(stage: str):
+            await self.store.set_progress(job_id, stage)
+
+        try:
+            result = await self._run(job["url"], progress)
+        except asyncio.CancelledError:
+            # Shutting down: leave the job running so the next start requeues it.
+            raise
+        except Exception as e:
+            self._stats["failed"] += 1
+            await self.store.fail(job_id, getattr(e, "detail", None) or str(e), getattr(e, "status_code", 500))
+            return
+        self._stats["completed"] += 1
+        await self.store.finish(job_id, result)
+
+    async def _purge_loop(self):
+        while True:
+            try:
+                self._stats["purged"] += await self.store.purge(time.time() - self.retention)
+            except Exception as e:
+                logger.warning("Purging expired jobs failed: %s", e)
+            await asyncio.sleep(self.purge_interval)
@@ -0,0 +1,147 @@
+# job_store.py
+import asyncio
+import json
+import time
+import uuid
+
+from sqlite_store import SQLiteStore
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    status TEXT NOT NULL,
+    progress TEXT,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    result TEXT,
+    error TEXT,
+    status_code INTEGER
+);
+CREATE INDEX IF NOT EXISTS jobs_by_url ON jobs (url, created_at);
+CREATE INDEX IF NOT EXISTS jobs_by_status ON jobs (status, created_at);
+CREATE INDEX IF NOT EXISTS jobs_by_finished ON jobs (finished_at);
+"""
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+ACTIVE = (QUEUED, RUNNING)
+
+
+def _row_to_job(row) -> dict:
+    job = dict(row)
+    job["result"] = json.loads(job["result"]) if job["result"] else None
+    return job
+
+
+class JobStore(SQLiteStore):
+    """Analysis jobs persisted in SQLite so queued and finished work survives restarts.
+
+    One connection is shared behind a lock; every public method runs its
+    query in a worker thread via ``asyncio.to_thread`` so disk I/O never
+    blocks the event loop.
+    """
+
+    schema = SCHEMA
+
+    async def create(self, url: str) -> dict:
+        return await asyncio.to_thread(self._create, url)
+
+    async def get(self, job_id: str):
+        return await asyncio.to_thread(self._get, job_id)
+
+    async def find_active(self, url: str):
+        """The newest queued or running job for ``url``, if any."""
+        return await asyncio.to_thread(self._find_active, url)
+
+    async def list_by_url(self, url: str, limit: int = 20) -> list:
+        return await asyncio.to_thread(self._list_by_url, url, limit)
+
+    async def claim_next(self):
+        """Atomically move the oldest queued job to running and return it."""
+        return await asyncio.to_thread(self._claim_next)
+
+    async def set_progress(self, job_id: str, progress: str):
+        await asyncio.to_thread(self._execute, "UPDATE jobs SET progress = ? WHERE id = ?", (progress, job_id))
+
+    async def finish(self, job_id: str, result: dict):
+        await asyncio.to_thread(
+            self._execute,
+            "UPDATE jobs SET status = ?, progress = ?, result = ?, finished_at = ? WHERE id = ?",
+            (DONE, DONE, json.dumps(result), time.time(), job_id),
+        )
+
+    async def fail(self, job_id: str, error: str, status_code: int = 500):
+        await asyncio.to_thread(
+            self._execute,
+            "UPDATE jobs SET status = ?, error = ?, status_code = ?, finished_at = ? WHERE id = ?",
+            (FAILED, error, status_code, time.time(), job_id),
+        )
+
+    async def requeue_running(self) -> int:
+        """Return jobs left running by a previous process to the queue; returns how many."""
+        return await asyncio.to_thread(
+            self._execute, "UPDATE jobs SET status = ?, progress = NULL WHERE status = ?", (QUEUED, RUNNING)
+        )
+
+    async def purge(self, older_than: float) -> int:
+        """Delete finished jobs that finished before ``older_than`` (epoch seconds)."""
+        return await asyncio.to_thread(
+            self._execute, "DELETE FROM jobs WHERE finished_at IS NOT NULL AND finished_at < ?", (older_than,)
+        )
+
+    async def counts(self) -> dict:
+        return await asyncio.to_thread(self._counts)
+
+    def _create(self, url: str) -> dict:
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO jobs (id, url, status, created_at) VALUES (?, ?, ?, ?)",
+                (job_id, url, QUEUED, time.time()),
+            )
+        return self._get(job_id)
+
+    def _get(self, job_id: str):
+        with self._lock:
+            row = self._db.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return _row_to_job(row) if row else None
+
+    def _find_active(self, url: str):
+        with self._lock:
+            row = self._db.execute(
+                "SELECT * FROM jobs WHERE url = ? AND status IN (?, ?) ORDER BY created_at DESC LIMIT 1",
+                (url, *ACTIVE),
+            ).fetchone()
+        return _row_to_job(row) if row else None
+
+    def _list_by_url(self, url: str, limit: int) -> list:
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT * FROM jobs WHERE url = ? ORDER BY created_at DESC LIMIT ?", (url, limit)
+            ).fetchall()
+        return [_row_to_job(row) for row in rows]
+
+    def _claim_next(self):
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._db.execute(
+                    "SELECT id FROM jobs WHERE status = ? ORDER BY created_at LIMIT 1", (QUEUED,)
+                ).fetchone()
+                if row is not None:
+                    self._db.execute(
+                        "UPDATE jobs SET status = ?, started_at = ?, attempts = attempts + 1 WHERE id = ?",
+                        (RUNNING, time.time(), row["id"]),
+                    )
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+        return self._get(row["id"]) if row is not None else None
+
+    def _counts(self) -> dict:
+        with self._lock:
+            rows = self._db.execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status").fetchall()
+        return {row["status"]: row["n"] for row in rows}
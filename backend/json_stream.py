@@ -0,0 +1,162 @@
+# json_stream.py
+import json
+
+_WHITESPACE = " \t\r\n"
+_SCALAR_START = "-0123456789tfn"
+_SCALAR_END = ",}]" + _WHITESPACE
+
+
+class MalformedJSON(ValueError):
+    pass
+
+
+class _Container:
+    __slots__ = ("kind", "key", "expect", "start")
+
+    def __init__(self, kind: str, start: int):
+        self.kind = kind
+        self.key = None
+        # object: key -> colon -> value -> comma; array: value -> comma
+        self.expect = "key" if kind == "{" else "value"
+        self.start = start
+
+
+class IncrementalJSONParser:
+    """Parses one JSON object fed in arbitrary text chunks, reporting values as they complete.
+
+    ``feed`` returns ``(path, value)`` for every value that finished inside
+    the chunk at most ``max_depth`` levels below the root, where ``path`` is
+    the tuple of object keys leading to it (array positions are not part of
+    the path, and array items are not reported). Anything that cannot be the
+    start of valid JSON raises MalformedJSON at the offending character
+    instead of after the last token; ``close`` raises it for truncated input.
+    """
+
+    def __init__(self, max_depth: int = 2):
+        self.max_depth = max_depth
+        self._text = ""
+        self._pos = 0
+        self._stack = []
+        self._done = False
+        self._in_string = False
+        self._escaped = False
+        self._token_start = None
+        self._scalar = False
+
+    def feed(self, chunk: str) -> list:
+        self._text += chunk
+        completed = []
+        text = self._text
+        while self._pos < len(text):
+            char = text[self._pos]
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+                    self._end_string(completed)
+                self._pos += 1
+                continue
+            if self._scalar:
+                if char not in _SCALAR_END:
+                    self._pos += 1
+                    continue
+                self._scalar = False
+                self._finish_value(self._token_start, self._pos, completed)
+                # Re-examine the delimiter as structure.
+                continue
+            self._structure(char, completed)
+            self._pos += 1
+        return completed
+
+    def close(self):
+        """The whole parsed object; raises MalformedJSON if the input stopped short."""
+        if not self._done:
+            raise MalformedJSON(f"truncated after {len(self._text)} characters")
+        try:
+            return json.loads(self._text)
+        except json.JSONDecodeError as e:
+            # Values nested deeper than max_depth are only checked here.
+            raise MalformedJSON(f"invalid value at offset {e.pos}") from e
+
+    def _fail(self, what: str):
+        raise MalformedJSON(f"{what} at offset {self._pos}: {self._text[self._pos:self._pos + 20]!r}")
+
+    def _structure(self, char: str, completed: list):
+        if char in _WHITESPACE:
+            return
+        if self._done:
+            self._fail("trailing data")
+        top = self._stack[-1] if self._stack else None
+        if top is None:
+            if char != "{":
+                self._fail("expected '{'")
+            self._stack.append(_Container("{", self._pos))
+            return
+
+        if top.expect == "colon":
+            if char != ":":
+                self._fail("expected ':'")
+            top.expect = "value"
+        elif top.expect == "comma":
+            if char == ",":
+                top.expect = "key" if top.kind == "{" else "value"
+            elif char == ("}" if top.kind == "{" else "]"):
+                self._close_container(completed)
+            else:
+                self._fail("expected ',' or end of container")
+        elif top.expect == "key":
+            if char == '"':
+                self._in_string = True
+                self._token_start = self._pos
+            elif char == "}" and self._text[top.start + 1:self._pos].strip() == "":
+                self._close_container(completed)
+            else:
+                self._fail("expected object key")
+        else:
+            if char in "{[":
+                self._stack.append(_Container(char, self._pos))
+            elif char == '"':
+                self._in_string = True
+                self._token_start = self._pos
+            elif char in _SCALAR_START:
+                self._scalar = True
+                self._token_start = self._pos
+            elif char == "]" and top.kind == "[" and self._text[top.start + 1:self._pos].strip() == "":
+                self._close_container(completed)
+            else:
+                self._fail("expected a value")
+
+    def _end_string(self, completed: list):
+        top = self._stack[-1]
+        if top.expect == "key":
+            try:
+                top.key = json.loads(self._text[self._token_start:self._pos + 1])
+            except json.JSONDecodeError:
+                self._pos = self._token_start
+                self._fail("invalid key")
+            top.expect = "colon"
+        else:
+            self._finish_value(self._token_start, self._pos + 1, completed)
+
+    def _close_container(self, completed: list):
+        container = self._stack.pop()
+        if not self._stack:
+            self._done = True
+            return
+        self._finish_value(container.start, self._pos + 1, completed)
+
+    def _finish_value(self, start: int, end: int, completed: list):
+        parent = self._stack[-1]
+        parent.expect = "comma"
+        depth = len(self._stack)
+        if depth > self.max_depth or any(c.kind != "{" for c in self._stack):
+            return
+        try:
+            value = json.loads(self._text[start:end])
+        except json.JSONDecodeError:
+            self._pos = start
+            self._fail("invalid value")
+        completed.append((tuple(c.key for c in self._stack), value))
@@ -1,26 +1,276 @@
 # main.py
-from fastapi import FastAPI, Query, HTTPException
+import asyncio
+from contextlib import asynccontextmanager, nullcontext
+import aiohttp
+import zlib
+from fastapi import FastAPI, Query, HTTPException, Response
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from typing import List, Optional
+import json
 from fastapi.middleware.cors import CORSMiddleware
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service as ChromeService
-from selenium.webdriver.chrome.options import Options as ChromeOptions
-from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
 from urllib.parse import urlparse
+import logging
 import os
+import time
 from dotenv import load_dotenv
 
-from seo_analyzer import analyze_meta_tags_with_openai
-from pagespeed_checker import run_pagespeed
+from seo_analyzer import analyze_meta_tags_with_openai, stream_meta_tags_with_openai, create_openai_client
+from pagespeed_checker import run_pagespeed, create_pagespeed_session, PAGESPEED_ENDPOINT
 from seo_analyzer import generate_preview_data
+from browser_pool import BrowserPool, PoolTimeout, create_driver
+from browser_executor import BrowserExecutor, ExecutorBusy
+from meta_extractor import extract_meta, wait_for_quiet_head, head_hash
+from static_fetcher import fetch_static_meta
+from cdp_backend import CDPBrowser
+from chrome_setup import resolve_chrome
+from result_cache import ResultCache
+from single_flight import SingleFlight
+from url_canon import UrlCanonicalizer, DEFAULT_TRACKING_PARAMS
+from batch_analyzer import stream_batch
+from job_store import JobStore
+from job_runner import JobRunner
+from sitemap_reader import SitemapReader
+from crawl_state import CrawlState
+from speculation import Speculation, new_speculation_stats
+from site_crawler import SiteCrawler
+from resource_blocking import ResourcePolicy, DEFAULT_ALLOWED_TYPES, new_network_counters, count_from_performance_log
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 PAGESPEED_API_KEY = os.getenv("PAGESPEED_API_KEY")
 
-app = FastAPI()
+# Shared OpenAI client settings (HTTP/2 needs the h2 package)
+OPENAI_MAX_CONNECTIONS = int(os.getenv("OPENAI_MAX_CONNECTIONS", "20"))
+OPENAI_MAX_KEEPALIVE = int(os.getenv("OPENAI_MAX_KEEPALIVE", "10"))
+OPENAI_TIMEOUT = float(os.getenv("OPENAI_TIMEOUT", "60"))
+OPENAI_HTTP2 = os.getenv("OPENAI_HTTP2", "false").lower() in ("1", "true", "yes")
+# Extra attempts when a streamed AI reply turns out malformed or truncated
+OPENAI_STREAM_RETRIES = int(os.getenv("OPENAI_STREAM_RETRIES", "1"))
+
+# Shared PageSpeed session settings
+PAGESPEED_API_URL = os.getenv("PAGESPEED_API_URL", PAGESPEED_ENDPOINT)
+PAGESPEED_LIMIT_PER_HOST = int(os.getenv("PAGESPEED_LIMIT_PER_HOST", "50"))
+PAGESPEED_KEEPALIVE = float(os.getenv("PAGESPEED_KEEPALIVE", "60"))
+PAGESPEED_DNS_TTL = int(os.getenv("PAGESPEED_DNS_TTL", "300"))
+PAGESPEED_TIMEOUT = float(os.getenv("PAGESPEED_TIMEOUT", "120"))
+
+# Result caches; expired entries are served stale for the grace window while
+# one background task refreshes them
+PAGESPEED_CACHE_TTL = float(os.getenv("PAGESPEED_CACHE_TTL", "600"))
+PAGESPEED_STALE_GRACE = float(os.getenv("PAGESPEED_STALE_GRACE", "1800"))
+PAGESPEED_CACHE_MAX_BYTES = int(os.getenv("PAGESPEED_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+ANALYZE_CACHE_TTL = float(os.getenv("ANALYZE_CACHE_TTL", "1800"))
+ANALYZE_STALE_GRACE = float(os.getenv("ANALYZE_STALE_GRACE", "3600"))
+ANALYZE_CACHE_MAX_BYTES = int(os.getenv("ANALYZE_CACHE_MAX_BYTES", str(16 * 1024 * 1024)))
+# XFetch beta for probabilistic early refresh; 0 disables it
+CACHE_EARLY_BETA = float(os.getenv("CACHE_EARLY_BETA", "1.0"))
+
+# Query parameters dropped from cache and dedupe keys; "name*" matches by prefix
+TRACKING_PARAMS = [p.strip() for p in os.getenv("TRACKING_PARAMS", ",".join(DEFAULT_TRACKING_PARAMS)).split(",") if p.strip()]
+
+# "selenium" (pooled WebDriver) or "cdp" (browser contexts over DevTools)
+SCRAPER_BACKEND = os.getenv("SCRAPER_BACKEND", "selenium").lower()
+
+# Explicit Chrome/chromedriver locations; resolved once at startup when unset
+CHROMEDRIVER_PATH = os.getenv("CHROMEDRIVER_PATH")
+CHROME_BINARY = os.getenv("CHROME_BINARY")
+
+# Resource blocking and navigation settings shared by both browser backends
+BLOCK_RESOURCES = os.getenv("BLOCK_RESOURCES", "true").lower() in ("1", "true", "yes")
+ALLOWED_RESOURCE_TYPES = [t.strip() for t in os.getenv("ALLOWED_RESOURCE_TYPES", ",".join(DEFAULT_ALLOWED_TYPES)).split(",") if t.strip()]
+BLOCK_THIRD_PARTY_SCRIPTS = os.getenv("BLOCK_THIRD_PARTY_SCRIPTS", "true").lower() in ("1", "true", "yes")
+# "normal", "eager" (DOMContentLoaded) or "none"; late <head> changes are
+# caught by the quiet-head readiness check instead of waiting for onload.
+PAGE_LOAD_STRATEGY = os.getenv("PAGE_LOAD_STRATEGY", "eager")
+# <head> counts as ready after this long without mutations
+HEAD_QUIET_MS = int(os.getenv("HEAD_QUIET_MS", "300"))
+HEAD_READY_TIMEOUT = float(os.getenv("HEAD_READY_TIMEOUT", "5"))
+# Start the AI call as soon as the head is quiet, while the browser is still
+# being reset and released; discarded and redone if the returned head differs
+SPECULATIVE_AI = os.getenv("SPECULATIVE_AI", "false").lower() in ("1", "true", "yes")
+
+resource_policy = ResourcePolicy(ALLOWED_RESOURCE_TYPES, BLOCK_THIRD_PARTY_SCRIPTS) if BLOCK_RESOURCES else None
+# What create_driver installs on every pooled driver
+BLOCKED_URL_PATTERNS = resource_policy.blocked_url_patterns() if resource_policy else []
+
+# Browser pool settings
+BROWSER_POOL_SIZE = int(os.getenv("BROWSER_POOL_SIZE", "2"))
+BROWSER_QUEUE_TIMEOUT = float(os.getenv("BROWSER_QUEUE_TIMEOUT", "30"))
+BROWSER_MAX_PAGES = int(os.getenv("BROWSER_MAX_PAGES", "50"))
+BROWSER_MAX_RSS_MB = float(os.getenv("BROWSER_MAX_RSS_MB", "0")) or None
+BROWSER_CONCURRENCY = int(os.getenv("BROWSER_CONCURRENCY", str(BROWSER_POOL_SIZE)))
+BROWSER_MAX_QUEUE = int(os.getenv("BROWSER_MAX_QUEUE", "8"))
+
+# CDP backend settings
+CDP_PROCESSES = int(os.getenv("CDP_PROCESSES", "1"))
+CDP_MAX_PAGES = int(os.getenv("CDP_MAX_PAGES", "24"))
+CDP_PAGE_TIMEOUT = float(os.getenv("CDP_PAGE_TIMEOUT", "15"))
+
+# Batch analysis settings
+BATCH_MAX_URLS = int(os.getenv("BATCH_MAX_URLS", "1000"))
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "4"))
+# Finished results buffered before a slow reader stalls the batch
+BATCH_QUEUE_SIZE = int(os.getenv("BATCH_QUEUE_SIZE", "8"))
+
+# Sitemap ingestion settings
+SITEMAP_MAX_URLS = int(os.getenv("SITEMAP_MAX_URLS", "50000"))
+SITEMAP_CONCURRENCY = int(os.getenv("SITEMAP_CONCURRENCY", "4"))
+SITEMAP_MAX_DEPTH = int(os.getenv("SITEMAP_MAX_DEPTH", "3"))
+
+# Link-following site crawl settings
+CRAWL_MAX_PAGES = int(os.getenv("CRAWL_MAX_PAGES", "1000"))
+CRAWL_MAX_DEPTH = int(os.getenv("CRAWL_MAX_DEPTH", "5"))
+CRAWL_CONCURRENCY = int(os.getenv("CRAWL_CONCURRENCY", "4"))
+CRAWL_PER_HOST = int(os.getenv("CRAWL_PER_HOST", "2"))
+# Minimum seconds between requests to one host; robots.txt Crawl-delay can raise it
+CRAWL_DELAY = float(os.getenv("CRAWL_DELAY", "0.5"))
+# Bloom filter sizing for the seen-URL set (~1.8 MB at the defaults)
+CRAWL_SEEN_CAPACITY = int(os.getenv("CRAWL_SEEN_CAPACITY", "1000000"))
+CRAWL_SEEN_ERROR_RATE = float(os.getenv("CRAWL_SEEN_ERROR_RATE", "0.001"))
+
+# Per-page state kept between incremental crawls
+CRAWL_STATE_PATH = os.getenv("CRAWL_STATE_PATH", "crawl_state.db")
+
+# Background job settings
+JOB_DB_PATH = os.getenv("JOB_DB_PATH", "jobs.db")
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+# Seconds finished jobs are kept; 0 keeps them forever
+JOB_RETENTION = float(os.getenv("JOB_RETENTION", str(7 * 86400)))
+JOB_PURGE_INTERVAL = float(os.getenv("JOB_PURGE_INTERVAL", "3600"))
+
+# Static HTTP fast path settings
+STATIC_FAST_PATH = os.getenv("STATIC_FAST_PATH", "true").lower() in ("1", "true", "yes")
+STATIC_FETCH_TIMEOUT = float(os.getenv("STATIC_FETCH_TIMEOUT", "10"))
+STATIC_MAX_BYTES = int(os.getenv("STATIC_MAX_BYTES", str(512 * 1024)))
+
+browser_pool = BrowserPool(
+    size=BROWSER_POOL_SIZE,
+    queue_timeout=BROWSER_QUEUE_TIMEOUT,
+    max_pages=BROWSER_MAX_PAGES,
+    max_rss_mb=BROWSER_MAX_RSS_MB,
+    driver_factory=lambda: create_driver(
+        PAGE_LOAD_STRATEGY,
+        resource_policy,
+        driver_path=startup_stats.get("driver_path"),
+        browser_path=startup_stats.get("browser_path"),
+    ),
+)
+browser_executor = BrowserExecutor(max_workers=BROWSER_CONCURRENCY, max_queue=BROWSER_MAX_QUEUE)
+cdp_browser = CDPBrowser(
+    processes=CDP_PROCESSES,
+    max_pages=CDP_MAX_PAGES,
+    page_timeout=CDP_PAGE_TIMEOUT,
+    page_load_strategy=PAGE_LOAD_STRATEGY,
+    resource_policy=resource_policy,
+    head_quiet_ms=HEAD_QUIET_MS,
+    head_ready_timeout=HEAD_READY_TIMEOUT,
+)
+# One canonical spelling per page for every cache, single-flight and dedupe key
+canonicalize_url = UrlCanonicalizer(TRACKING_PARAMS).canonicalize
+# Identical concurrent requests share one computation per endpoint
+pagespeed_flights = SingleFlight()
+analyze_flights = SingleFlight()
+pagespeed_cache = ResultCache(
+    max_bytes=PAGESPEED_CACHE_MAX_BYTES,
+    ttl=PAGESPEED_CACHE_TTL,
+    stale_grace=PAGESPEED_STALE_GRACE,
+    early_beta=CACHE_EARLY_BETA,
+    single_flight=pagespeed_flights,
+)
+analyze_cache = ResultCache(
+    max_bytes=ANALYZE_CACHE_MAX_BYTES,
+    ttl=ANALYZE_CACHE_TTL,
+    stale_grace=ANALYZE_STALE_GRACE,
+    early_beta=CACHE_EARLY_BETA,
+    single_flight=analyze_flights,
+)
+crawl_state = CrawlState(CRAWL_STATE_PATH)
+job_store = JobStore(JOB_DB_PATH)
+job_runner = JobRunner(
+    job_store,
+    run=lambda url, progress: run_job(url, progress),
+    workers=JOB_WORKERS,
+    retention=JOB_RETENTION,
+    purge_interval=JOB_PURGE_INTERVAL,
+)
+# Resolved browser paths and cold-start timings, filled in by lifespan
+startup_stats = {}
+scrape_stats = {
+    "static": 0,
+    "browser": 0,
+    # Wire bytes of static fetches, and Content-Length where the server sent one
+    "static_bytes_read": 0,
+    "static_content_length": 0,
+    "static_bytes_saved": 0,
+}
+
+speculation_stats = new_speculation_stats()
+
+@asynccontextmanager
+async def analysis_resources(app: FastAPI):
+    """Browsers, HTTP sessions and the OpenAI client the analysis pipeline needs, in ``app.state``.
+
+    Shared by the server lifespan and bulk_runner, which must not start the
+    job runner: it would requeue and claim the live server's jobs.
+    """
+    startup_stats.update(resolve_chrome(CHROMEDRIVER_PATH, CHROME_BINARY, need_driver=SCRAPER_BACKEND != "cdp"))
+    started = time.perf_counter()
+    if SCRAPER_BACKEND == "cdp":
+        cdp_browser.chrome_binary = startup_stats["browser_path"]
+        await cdp_browser.start()
+    else:
+        unblockable = resource_policy.url_unblockable_types() if resource_policy else []
+        if unblockable:
+            logger.warning("ALLOWED_RESOURCE_TYPES excludes %s, which the selenium backend cannot block"
+                           " by URL; use SCRAPER_BACKEND=cdp to block them", ", ".join(unblockable))
+        browser_pool.start()
+    startup_stats["browser_warmup_ms"] = elapsed_ms(started)
+    # auto_decompress=False so the static fetcher counts bytes as sent on the wire
+    app.state.http_session = aiohttp.ClientSession(auto_decompress=False)
+    # Without a key only AI analysis is unavailable, not the whole service
+    app.state.openai_client = create_openai_client(
+        OPENAI_API_KEY,
+        max_connections=OPENAI_MAX_CONNECTIONS,
+        max_keepalive=OPENAI_MAX_KEEPALIVE,
+        timeout=OPENAI_TIMEOUT,
+        http2=OPENAI_HTTP2,
+    ) if OPENAI_API_KEY else None
+    app.state.pagespeed_session = create_pagespeed_session(
+        limit_per_host=PAGESPEED_LIMIT_PER_HOST,
+        keepalive_timeout=PAGESPEED_KEEPALIVE,
+        dns_cache_ttl=PAGESPEED_DNS_TTL,
+        timeout=PAGESPEED_TIMEOUT,
+    )
+    try:
+        yield
+    finally:
+        await app.state.pagespeed_session.close()
+        if app.state.openai_client is not None:
+            await app.state.openai_client.close()
+        await app.state.http_session.close()
+        browser_executor.shutdown()
+        browser_pool.close()
+        await cdp_browser.close()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    async with analysis_resources(app):
+        crawl_state.open()
+        job_store.open()
+        await job_runner.start()
+        try:
+            yield
+        finally:
+            await job_runner.close()
+            job_store.close()
+            crawl_state.close()
+
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -33,41 +283,135 @@ app.add_middleware(
 def is_valid_url(url: str) -> bool:
     try:
         parsed = urlparse(url)
-        return all([parsed.scheme in ("http", "https"), parsed.netloc])
+        parsed.port  # raises ValueError for a malformed port
+        canonicalize_url(url)  # raises ValueError for hosts IDNA cannot encode
+        return all([parsed.scheme in ("http", "https"), parsed.hostname])
     except:
         return False
 
-def scrape_all_meta_tags(url: str):
-    chrome_options = ChromeOptions()
-    chrome_options.add_argument("--headless")
-    chrome_options.add_argument("--no-sandbox")
-    chrome_options.add_argument("--disable-gpu")
-    chrome_options.add_argument("--disable-dev-shm-usage")
-    service = ChromeService()
-    driver = webdriver.Chrome(service=service, options=chrome_options)
+def elapsed_ms(started: float) -> int:
+    return round((time.perf_counter() - started) * 1000)
 
-    try:
-        driver.get(url)
-        WebDriverWait(driver, 15).until(EC.presence_of_element_located((By.TAG_NAME, "head")))
-        title = driver.title
-        meta_elements = driver.find_elements(By.TAG_NAME, "meta")
-        meta_tags = []
-        for meta in meta_elements:
-            tag_info = {
-                "name": meta.get_attribute("name"),
-                "property": meta.get_attribute("property"),
-                "content": meta.get_attribute("content"),
-                "charset": meta.get_attribute("charset"),
-                "http_equiv": meta.get_attribute("http-equiv")
-            }
-            if any(tag_info.values()):
-                meta_tags.append(tag_info)
-        return {
-            "title": title,
-            "meta_tags": meta_tags
-        }
-    finally:
-        driver.quit()
+def _left_blank_page(driver) -> bool:
+    # With eager/none page loads driver.get can return before about:blank is replaced
+    return driver.execute_script("return location.href !== 'about:blank' && !!document.head")
+
+def scrape_all_meta_tags(url: str, report: dict = None, on_head=None):
+    timings = {}
+    started = time.perf_counter()
+    with browser_pool.lease() as driver:
+        timings["lease_ms"] = elapsed_ms(started)
+        page_patterns = None
+        if resource_policy is not None:
+            # Drop network events left over from the previous lease
+            driver.get_log("performance")
+            # Never block the document itself: a page whose own URL matches a
+            # pattern (say, /intro.webm) gets a list without that pattern
+            page_patterns = resource_policy.blocked_url_patterns(url)
+            if page_patterns != BLOCKED_URL_PATTERNS:
+                driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": page_patterns})
+        try:
+            phase = time.perf_counter()
+            driver.get(url)
+            WebDriverWait(driver, HEAD_READY_TIMEOUT).until(_left_blank_page)
+            timings["navigate_ms"] = elapsed_ms(phase)
+
+            phase = time.perf_counter()
+            readiness = wait_for_quiet_head(driver, HEAD_QUIET_MS, HEAD_READY_TIMEOUT * 1000)
+            timings["ready_ms"] = elapsed_ms(phase)
+
+            phase = time.perf_counter()
+            scraped = extract_meta(driver)
+            timings["extract_ms"] = elapsed_ms(phase)
+            if on_head is not None:
+                # The settled head, handed over before the driver is reset and released
+                on_head(scraped)
+        finally:
+            if page_patterns is not None and page_patterns != BLOCKED_URL_PATTERNS:
+                driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCKED_URL_PATTERNS})
+
+        if report is not None:
+            report.setdefault("timings", {}).update(timings)
+            report["readiness"] = readiness
+            if resource_policy is not None:
+                counters = new_network_counters()
+                count_from_performance_log(driver.get_log("performance"), counters)
+                report["network"] = counters
+        return scraped
+
+def record_transfer(transfer: dict):
+    scrape_stats["static_bytes_read"] += transfer["bytes_read"]
+    if transfer["content_length"] is not None:
+        scrape_stats["static_content_length"] += transfer["content_length"]
+        scrape_stats["static_bytes_saved"] += max(0, transfer["content_length"] - transfer["bytes_read"])
+
+async def render_meta(url: str, report: dict = None, on_head=None) -> dict:
+    """Scrape a page in a real browser with the configured backend.
+
+    Diagnostics such as network counters are added to ``report``.
+    ``on_head``, if given, is called on the event loop with the extracted
+    head once it has settled, before the browser is reset and released.
+    """
+    if SCRAPER_BACKEND == "cdp":
+        return await cdp_browser.scrape(url, report, on_head)
+    if on_head is not None:
+        loop = asyncio.get_running_loop()
+        on_head_threadsafe = lambda scraped: loop.call_soon_threadsafe(on_head, scraped)
+        return await browser_executor.run(scrape_all_meta_tags, url, report, on_head_threadsafe)
+    return await browser_executor.run(scrape_all_meta_tags, url, report)
+
+async def scrape_meta(url: str, validators: dict = None, on_head=None, polite=None):
+    """Scrape title and meta tags, using Chrome only when plain HTTP is not enough.
+
+    Returns the scraped data and a dict describing which path produced it,
+    including the page's ETag/Last-Modified ``validators`` when it was
+    fetched over HTTP. Passing stored ``validators`` makes that fetch
+    conditional; an unchanged page comes back empty with ``not_modified``.
+    ``on_head`` is passed to render_meta when the browser is used.
+    ``polite(url)``, if given, is an async context manager held around each
+    request to the page's host, such as SiteCrawler.polite.
+    """
+    slot = polite or (lambda _url: nullcontext())
+    fallback_reason = "static fast path disabled"
+    timings = {}
+    response_validators = None
+    if STATIC_FAST_PATH:
+        started = time.perf_counter()
+        try:
+            async with slot(url):
+                scraped = await fetch_static_meta(
+                    app.state.http_session, url, timeout=STATIC_FETCH_TIMEOUT, max_bytes=STATIC_MAX_BYTES,
+                    validators=validators
+                )
+            fallback_reason = scraped.pop("fallback_reason")
+            transfer = scraped.pop("transfer")
+            response_validators = scraped.pop("validators")
+            not_modified = scraped.pop("not_modified", False)
+            record_transfer(transfer)
+            timings["static_fetch_ms"] = elapsed_ms(started)
+            if not fallback_reason:
+                scrape_stats["static"] += 1
+                scrape_info = {"source": "static", "transfer": transfer, "timings": timings,
+                               "validators": response_validators}
+                if not_modified:
+                    scrape_info["not_modified"] = True
+                return scraped, scrape_info
+        except (aiohttp.ClientError, asyncio.TimeoutError, zlib.error) as e:
+            fallback_reason = f"static fetch failed: {e.__class__.__name__}"
+            timings["static_fetch_ms"] = elapsed_ms(started)
+
+    scrape_info = {
+        "source": "browser",
+        "backend": SCRAPER_BACKEND,
+        "fallback_reason": fallback_reason,
+        "timings": timings
+    }
+    if response_validators:
+        scrape_info["validators"] = response_validators
+    async with slot(url):
+        scraped = await render_meta(url, scrape_info, on_head)
+    scrape_stats["browser"] += 1
+    return scraped, scrape_info
 
 def categorize_meta_tags(meta_tags):
     categories = {
@@ -107,51 +451,548 @@ def categorize_meta_tags(meta_tags):
             categories["other"].append(tag)
             
     return categories
-# Routes
-@app.get("/analyze")
-async def analyze_seo(url: str = Query(..., description="URL to analyze (include http/https)")):
-    if not is_valid_url(url):
-        raise HTTPException(status_code=400, detail="Invalid URL format. Include http:// or https://")
+class AnalysisIncomplete(HTTPException):
+    """The AI step failed after a successful scrape; ``result`` holds everything else."""
+
+    def __init__(self, result: dict, error: HTTPException):
+        super().__init__(status_code=error.status_code, detail=error.detail)
+        self.result = result
 
+def openai_client():
+    if app.state.openai_client is None:
+        raise HTTPException(status_code=503, detail="AI analysis is not configured: OPENAI_API_KEY is not set")
+    return app.state.openai_client
+
+async def ai_analysis(url: str, scraped_data: dict) -> dict:
+    return await analyze_meta_tags_with_openai(
+        url,
+        scraped_data['title'],
+        categorize_meta_tags(scraped_data["meta_tags"]),
+        client=openai_client()
+    )
+
+def new_speculation(url: str):
+    """A Speculation for ``url`` if enabled; its ``start`` is scrape_meta's ``on_head``."""
+    if not SPECULATIVE_AI:
+        return None
+    return Speculation(lambda scraped_data: ai_analysis(url, scraped_data), speculation_stats)
+
+async def analyze_scraped(url: str, scraped_data: dict, scrape_info: dict, progress=None,
+                          speculation: Speculation = None) -> dict:
+    """Categorize, preview and AI-analyze meta tags that were already scraped.
+
+    A ``speculation`` started during the scrape is reused if the head did not change.
+    An AI failure raises AnalysisIncomplete carrying the rest of the result.
+    """
+    categorized = categorize_meta_tags(scraped_data["meta_tags"])
+    # Generate debugger-style preview data
+    preview_data = generate_preview_data(scraped_data, categorized)
+
+    if progress:
+        await progress("analyzing")
+    result = {
+        "url": url,
+        "current_data": {
+            "title": scraped_data["title"],
+            "meta_tags": categorized,
+            "preview_data": preview_data
+        },
+        "analysis": None,
+        "scrape": scrape_info
+    }
     try:
-        scraped_data = scrape_all_meta_tags(url)
-        categorized = categorize_meta_tags(scraped_data["meta_tags"])
-        # Generate debugger-style preview data
-        preview_data = generate_preview_data(scraped_data, categorized)
+        if speculation is not None:
+            result["analysis"] = await speculation.result(scraped_data)
+            if speculation.outcome:
+                scrape_info["speculative_ai"] = speculation.report()
+        else:
+            result["analysis"] = await ai_analysis(url, scraped_data)
+    except Exception as e:
+        raise AnalysisIncomplete(result, as_http_error(e)) from e
+    return result
 
-        ai_data = await analyze_meta_tags_with_openai(
-            url,
-            scraped_data['title'],
-            categorized,
-            api_key=OPENAI_API_KEY
-        )
+def as_http_error(e: Exception) -> HTTPException:
+    """The HTTPException an analysis failure ``e`` is reported as."""
+    if isinstance(e, HTTPException):
+        return e
+    if isinstance(e, (PoolTimeout, ExecutorBusy)):
+        return HTTPException(status_code=503, detail="All browsers are busy, please retry shortly")
+    return HTTPException(status_code=500, detail=f"SEO analysis failed: {str(e)}")
 
-        return {
-            "url": url,
-            "current_data": {
-                "title": scraped_data["title"],
-                "meta_tags": categorized,
-                "preview_data": preview_data
-            },
-            "analysis": ai_data
-        }
+async def run_analysis(url: str, progress=None, polite=None) -> dict:
+    """Scrape, categorize and AI-analyze one URL, mapping failures to HTTPException.
+
+    ``progress``, if given, is awaited with the name of each stage as it starts.
+    ``polite`` is passed to scrape_meta.
+    """
+    speculation = new_speculation(url)
+    try:
+        if progress:
+            await progress("scraping")
+        scraped_data, scrape_info = await scrape_meta(url, on_head=speculation.start if speculation else None,
+                                                      polite=polite)
+        return await analyze_scraped(url, scraped_data, scrape_info, progress, speculation)
     except HTTPException:
         raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"SEO analysis failed: {str(e)}")
+        raise as_http_error(e) from e
+    finally:
+        if speculation is not None:
+            speculation.cancel()
 
-@app.get("/pagespeed")
-async def check_pagespeed(url: str = Query(..., description="URL to analyze (include http/https)")):
-    if not is_valid_url(url):
-        raise HTTPException(status_code=400, detail="Invalid URL format. Include http:// or https://")
+async def run_incremental(url: str, lastmod: str = None, polite=None) -> dict:
+    """Re-analyze ``url`` only if its <head> changed since the previous crawl.
+
+    Unchanged sitemap ``lastmod`` skips the page without a request. Otherwise
+    it is fetched conditionally; a 304 or an identical head hash counts as
+    revalidated, and only a changed head is categorized and sent to the AI.
+    Crawl state is recorded only on success, so failed pages are retried.
+    """
+    previous = await crawl_state.get(url)
+    if previous and previous["head_hash"] and lastmod and previous["lastmod"] == lastmod:
+        return {"incremental": "skipped"}
+
+    validators = None
+    if previous and previous["head_hash"]:
+        validators = {"etag": previous["etag"], "last_modified": previous["last_modified"]}
     try:
-        data = await run_pagespeed(url, PAGESPEED_API_KEY)
-        return data
+        scraped_data, scrape_info = await scrape_meta(url, validators, polite=polite)
+        if scrape_info.get("not_modified"):
+            await crawl_state.record(url, lastmod, scrape_info["validators"])
+            return {"incremental": "revalidated"}
+        digest = head_hash(scraped_data)
+        if previous and previous["head_hash"] == digest:
+            await crawl_state.record(url, lastmod, scrape_info.get("validators"), digest)
+            return {"incremental": "revalidated"}
+        result = await analyze_scraped(url, scraped_data, scrape_info)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise as_http_error(e) from e
+
+    analyze_cache.set(url, result)
+    await crawl_state.record(url, lastmod, scrape_info.get("validators"), digest)
+    return {"incremental": "reprocessed", "result": result}
+
+async def analysis_events(url: str):
+    """The /analyze pipeline as (event, data) pairs, each yielded as soon as its stage is done.
+
+    Every event carries the cumulative stage timings so far. The AI reply is
+    streamed: each analysis section arrives as an ``analysis_field`` event
+    when complete, and ``analysis_retry`` means fields sent so far are void.
+    The assembled result is stored in the analyze cache like a regular
+    /analyze call.
+    """
+    started = time.perf_counter()
+    timings = {}
+    scraped_data, scrape_info = await scrape_meta(url)
+    categorized = categorize_meta_tags(scraped_data["meta_tags"])
+    timings["scrape_ms"] = elapsed_ms(started)
+    current_data = {"title": scraped_data["title"], "meta_tags": categorized}
+    yield "current_data", {"url": url, **current_data, "scrape": scrape_info, "timings": dict(timings)}
+
+    stage_started = time.perf_counter()
+    preview_data = generate_preview_data(scraped_data, categorized)
+    timings["preview_ms"] = elapsed_ms(stage_started)
+    yield "preview_data", {"preview_data": preview_data, "timings": dict(timings)}
+
+    stage_started = time.perf_counter()
+    async for kind, field, value in stream_meta_tags_with_openai(
+        url,
+        scraped_data["title"],
+        categorized,
+        client=openai_client(),
+        retries=OPENAI_STREAM_RETRIES
+    ):
+        if kind == "field":
+            yield "analysis_field", {"field": field, "value": value, "ai_ms": elapsed_ms(stage_started)}
+        elif kind == "retry":
+            yield "analysis_retry", {"reason": value, "ai_ms": elapsed_ms(stage_started)}
+        else:
+            ai_data = value
+    timings["ai_ms"] = elapsed_ms(stage_started)
+    timings["total_ms"] = elapsed_ms(started)
+    yield "analysis", {"analysis": ai_data, "timings": dict(timings)}
+
+    result = {
+        "url": url,
+        "current_data": {**current_data, "preview_data": preview_data},
+        "analysis": ai_data,
+        "scrape": scrape_info
+    }
+    analyze_cache.set(url, result, timings["total_ms"] / 1000)
+
+def cached_analysis_events(result: dict):
+    current_data = dict(result["current_data"])
+    preview_data = current_data.pop("preview_data")
+    yield "current_data", {"url": result["url"], **current_data, "scrape": result["scrape"], "timings": {}}
+    yield "preview_data", {"preview_data": preview_data, "timings": {}}
+    yield "analysis", {"analysis": result["analysis"], "timings": {}}
+
+def sse_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+async def fetch_pagespeed(url: str, strategy: str = None) -> dict:
+    try:
+        return await run_pagespeed(
+            url,
+            PAGESPEED_API_KEY,
+            session=app.state.pagespeed_session,
+            endpoint=PAGESPEED_API_URL,
+            strategy=strategy
+        )
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"PageSpeed analysis failed: {str(e)}")
 
+async def build_report(url: str, strategy: str = None) -> dict:
+    """/analyze and /pagespeed for one URL run side by side, merged into one document.
+
+    PageSpeed runs in parallel with the scrape -> AI chain in one TaskGroup,
+    so the total is the slower branch rather than the sum. Both go through
+    their caches exactly as /analyze and /pagespeed do. Each stage catches
+    its own failure into ``errors`` instead of cancelling the others: a
+    PageSpeed outage still returns the SEO analysis, and an AI failure still
+    returns the scraped tags. Only complete analyses are cached.
+    """
+    started = time.perf_counter()
+    timings = {}
+    errors = {}
+    cache = {}
+    report = {"url": url, "seo": None, "pagespeed": None}
+
+    async def stage(name: str, work):
+        stage_started = time.perf_counter()
+        try:
+            return await work()
+        except Exception as e:
+            error = as_http_error(e)
+            errors[name] = {"status_code": error.status_code, "detail": error.detail}
+            return None
+        finally:
+            timings[f"{name}_ms"] = elapsed_ms(stage_started)
+
+    async def seo():
+        # Through the analyze cache like /analyze, for its stale refresh and single-flight
+        stages = {}
+
+        async def progress(name: str):
+            stages[name] = time.perf_counter()
+
+        try:
+            report["seo"], cache["seo"] = await analyze_cache.get_or_compute(
+                url, lambda: run_analysis(url, progress)
+            )
+        except AnalysisIncomplete as e:
+            report["seo"] = e.result
+            errors["ai"] = {"status_code": e.status_code, "detail": e.detail}
+        except Exception as e:
+            error = as_http_error(e)
+            errors["scrape"] = {"status_code": error.status_code, "detail": error.detail}
+        # Per-stage timings exist only when this request ran the analysis itself
+        if "analyzing" in stages:
+            timings["scrape_ms"] = round((stages["analyzing"] - stages["scraping"]) * 1000)
+            timings["ai_ms"] = elapsed_ms(stages["analyzing"])
+        timings["seo_ms"] = elapsed_ms(started)
+
+    async def pagespeed():
+        async def work():
+            data, cache_status = await pagespeed_cache.get_or_compute(
+                (url, strategy or ""),
+                lambda: fetch_pagespeed(url, strategy)
+            )
+            cache["pagespeed"] = cache_status
+            return data
+        report["pagespeed"] = await stage("pagespeed", work)
+
+    async with asyncio.TaskGroup() as group:
+        group.create_task(seo())
+        group.create_task(pagespeed())
+
+    timings["total_ms"] = elapsed_ms(started)
+    report.update(timings=timings, errors=errors, cache=cache)
+    return report
+
+def batch_key(url: str) -> str:
+    if not is_valid_url(url):
+        raise HTTPException(status_code=400, detail="Invalid URL format. Include http:// or https://")
+    return canonicalize_url(url)
+
+async def analyze_cached(url: str, polite=None) -> dict:
+    """Batch worker: one canonical URL through the same cache and single-flight as /analyze."""
+    result, cache_status = await analyze_cache.get_or_compute(url, lambda: run_analysis(url, polite=polite))
+    return {"cache_status": cache_status, "result": result}
+
+async def batch_lines(source, analyze, concurrency: int, incremental: bool = False, source_stats: dict = None):
+    """stream_batch lines, adding incremental outcome counts and each ``source_stats`` object's stats() to the summary."""
+    counts = {"skipped": 0, "revalidated": 0, "reprocessed": 0}
+    async for line in stream_batch(source, analyze, batch_key, concurrency=concurrency, queue_size=BATCH_QUEUE_SIZE):
+        if "incremental" in line:
+            counts[line["incremental"]] += 1
+        if "summary" in line:
+            if incremental:
+                line["summary"]["incremental"] = counts
+            for name, stats_source in (source_stats or {}).items():
+                line["summary"][name] = stats_source.stats()
+        yield line
+
+def ndjson_response(lines) -> StreamingResponse:
+    async def body():
+        async for line in lines:
+            yield json.dumps(line) + "\n"
+    return StreamingResponse(body(), media_type="application/x-ndjson")
+
+async def run_job(url: str, progress) -> dict:
+    result, _ = await analyze_cache.get_or_compute(url, lambda: run_analysis(url, progress))
+    return result
+
+class JobRequest(BaseModel):
+    url: str
+
+class BatchRequest(BaseModel):
+    urls: List[str]
+    concurrency: Optional[int] = None
+    # Re-analyze only pages whose <head> changed since the last incremental run
+    incremental: bool = False
+
+class CrawlRequest(BaseModel):
+    url: str
+    max_pages: Optional[int] = None
+    max_depth: Optional[int] = None
+    concurrency: Optional[int] = None
+    incremental: bool = False
+
+class SitemapRequest(BaseModel):
+    url: str
+    limit: Optional[int] = None
+    concurrency: Optional[int] = None
+    incremental: bool = False
+
+# Routes
+@app.get("/analyze")
+async def analyze_seo(
+    response: Response,
+    url: str = Query(..., description="URL to analyze (include http/https)")
+):
+    if not is_valid_url(url):
+        raise HTTPException(status_code=400, detail="Invalid URL format. Include http:// or https://")
+
+    url = canonicalize_url(url)
+    result, cache_status = await analyze_cache.get_or_compute(url, lambda: run_analysis(url))
+    response.headers["Cache-Status"] = cache_status
+    return result
+
+@app.get("/analyze/stream")
+async def analyze_seo_stream(
+    url: str = Query(..., description="URL to analyze (include http/https)")
+):
+    """/analyze as Server-Sent Events: current_data, preview_data, analysis_field and analysis as each is ready.
+
+    A final ``done`` event (or ``error`` with status_code and detail) ends
+    the stream, so EventSource clients know to close instead of reconnecting.
+    Cached results are replayed at once, refreshed in the background when
+    stale, and a URL another request is already analyzing is waited for and
+    replayed rather than analyzed twice.
+    """
+    if not is_valid_url(url):
+        raise HTTPException(status_code=400, detail="Invalid URL format. Include http:// or https://")
+
+    url = canonicalize_url(url)
+
+    async def events():
+        started = time.perf_counter()
+        cached = analyze_cache.peek(url)
+        try:
+            if cached is not None or analyze_flights.running(url):
+                # A hit returns at once but refreshes a stale entry; a miss with
+                # an analysis already running waits for it instead of starting another
+                cached, _ = await analyze_cache.get_or_compute(url, lambda: run_analysis(url))
+            if cached is not None:
+                for event, data in cached_analysis_events(cached):
+                    yield sse_event(event, data)
+            else:
+                async for event, data in analysis_events(url):
+                    yield sse_event(event, data)
+        except Exception as e:
+            error = as_http_error(e)
+            yield sse_event("error", {"status_code": error.status_code, "detail": error.detail})
+            return
+        yield sse_event("done", {"cached": cached is not None, "total_ms": elapsed_ms(started)})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        # No proxy buffering, or the events arrive all at once at the end
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.get("/pagespeed")
+async def check_pagespeed(
+    response: Response,
+    url: str = Query(..., description="URL to analyze (include http/https)"),
+    strategy: str = Query(None, pattern="^(mobile|desktop)$", description="PageSpeed strategy")
+):
+    if not is_valid_url(url):
+        raise HTTPException(status_code=400, detail="Invalid URL format. Include http:// or https://")
+
+    url = canonicalize_url(url)
+    data, cache_status = await pagespeed_cache.get_or_compute(
+        (url, strategy or ""),
+        lambda: fetch_pagespeed(url, strategy)
+    )
+    response.headers["Cache-Status"] = cache_status
+    return data
+
+@app.get("/report")
+async def full_report(
+    url: str = Query(..., description="URL to analyze (include http/https)"),
+    strategy: str = Query(None, pattern="^(mobile|desktop)$", description="PageSpeed strategy")
+):
+    """SEO analysis and PageSpeed together; failed stages are listed in ``errors``.
+
+    Fails as a whole only when neither part produced anything.
+    """
+    if not is_valid_url(url):
+        raise HTTPException(status_code=400, detail="Invalid URL format. Include http:// or https://")
+
+    report = await build_report(canonicalize_url(url), strategy)
+    if report["seo"] is None and report["pagespeed"] is None:
+        first = next(iter(report["errors"].values()))
+        raise HTTPException(status_code=first["status_code"], detail=first["detail"])
+    return report
+
+@app.post("/analyze/batch")
+async def analyze_batch(request: BatchRequest):
+    """Stream one NDJSON line per URL as each analysis finishes, then a summary line."""
+    if not request.urls:
+        raise HTTPException(status_code=400, detail="No URLs given")
+    if len(request.urls) > BATCH_MAX_URLS:
+        raise HTTPException(status_code=413, detail=f"At most {BATCH_MAX_URLS} URLs per batch")
+
+    concurrency = max(1, min(request.concurrency or BATCH_CONCURRENCY, BATCH_CONCURRENCY))
+    analyze = run_incremental if request.incremental else analyze_cached
+    return ndjson_response(batch_lines(request.urls, analyze, concurrency, request.incremental))
+
+@app.post("/analyze/sitemap")
+async def analyze_sitemap(request: SitemapRequest):
+    """Analyze every page of a sitemap or sitemap index, streaming NDJSON as for /analyze/batch.
+
+    Pages are analyzed while the sitemap is still being read; the summary
+    line also carries the sitemap reader's counters. In incremental mode each
+    page's <lastmod> lets unchanged pages be skipped without a request.
+    """
+    if not is_valid_url(request.url):
+        raise HTTPException(status_code=400, detail="Invalid URL format. Include http:// or https://")
+
+    reader = SitemapReader(
+        app.state.http_session,
+        canonicalize_url,
+        concurrency=SITEMAP_CONCURRENCY,
+        max_depth=SITEMAP_MAX_DEPTH
+    )
+    limit = min(request.limit or SITEMAP_MAX_URLS, SITEMAP_MAX_URLS)
+    concurrency = max(1, min(request.concurrency or BATCH_CONCURRENCY, BATCH_CONCURRENCY))
+
+    # Canonical URL -> sitemap lastmod, only for pages queued but not yet
+    # analyzed. Invalid and duplicate URLs never reach analyze_incremental,
+    # so they are left out the same way stream_batch leaves them out.
+    lastmods = {}
+    queued = set()
+
+    async def page_urls():
+        async for url, lastmod in reader.urls(request.url, limit=limit):
+            if request.incremental:
+                try:
+                    key = batch_key(url)
+                except HTTPException:
+                    key = None
+                if key is not None and key not in queued:
+                    queued.add(key)
+                    lastmods[key] = lastmod
+            yield url
+
+    async def analyze_incremental(url: str) -> dict:
+        return await run_incremental(url, lastmods.pop(url, None))
+
+    analyze = analyze_incremental if request.incremental else analyze_cached
+    return ndjson_response(batch_lines(page_urls(), analyze, concurrency, request.incremental, {"sitemap": reader}))
+
+@app.post("/analyze/crawl")
+async def analyze_crawl(request: CrawlRequest):
+    """Crawl a site from one URL by following internal links and analyze each page, streaming NDJSON.
+
+    Pages are analyzed as they are discovered; the summary line also carries
+    the crawler's counters.
+    """
+    if not is_valid_url(request.url):
+        raise HTTPException(status_code=400, detail="Invalid URL format. Include http:// or https://")
+
+    crawler = SiteCrawler(
+        app.state.http_session,
+        canonicalize_url,
+        max_pages=min(request.max_pages or CRAWL_MAX_PAGES, CRAWL_MAX_PAGES),
+        max_depth=min(request.max_depth if request.max_depth is not None else CRAWL_MAX_DEPTH, CRAWL_MAX_DEPTH),
+        concurrency=CRAWL_CONCURRENCY,
+        per_host=CRAWL_PER_HOST,
+        crawl_delay=CRAWL_DELAY,
+        seen_capacity=CRAWL_SEEN_CAPACITY,
+        seen_error_rate=CRAWL_SEEN_ERROR_RATE
+    )
+    concurrency = max(1, min(request.concurrency or BATCH_CONCURRENCY, BATCH_CONCURRENCY))
+    # Analysis fetches the pages again, so it takes the crawler's host slots
+    # and crawl delay too instead of hitting the site at batch concurrency
+    analyze = run_incremental if request.incremental else analyze_cached
+    return ndjson_response(batch_lines(crawler.urls(request.url), lambda url: analyze(url, polite=crawler.polite),
+                                       concurrency, request.incremental, {"crawl": crawler}))
+
+@app.post("/jobs", status_code=202)
+async def submit_job(request: JobRequest):
+    """Queue an analysis and return its job at once; poll GET /jobs/{id} for the result."""
+    if not is_valid_url(request.url):
+        raise HTTPException(status_code=400, detail="Invalid URL format. Include http:// or https://")
+
+    url = canonicalize_url(request.url)
+    job = await job_store.find_active(url)
+    if job is None:
+        job = await job_store.create(url)
+        job_runner.notify()
+    return job
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    job = await job_store.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@app.get("/jobs")
+async def list_jobs(
+    url: str = Query(..., description="URL whose jobs to list, newest first"),
+    limit: int = Query(20, ge=1, le=100)
+):
+    if not is_valid_url(url):
+        raise HTTPException(status_code=400, detail="Invalid URL format. Include http:// or https://")
+    return await job_store.list_by_url(canonicalize_url(url), limit)
+
+@app.get("/stats")
+async def service_stats():
+    return {
+        "startup": startup_stats,
+        "browser_pool": browser_pool.stats(),
+        "browser_executor": browser_executor.stats(),
+        "cdp_browser": cdp_browser.stats(),
+        "scrape_sources": dict(scrape_stats),
+        "speculative_ai": dict(speculation_stats),
+        "analyze_cache": analyze_cache.stats(),
+        "pagespeed_cache": pagespeed_cache.stats(),
+        "jobs": await job_runner.stats(),
+        "single_flight": {
+            "analyze": analyze_flights.stats(),
+            "pagespeed": pagespeed_flights.stats()
+        }
+    }
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
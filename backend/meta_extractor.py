@@ -0,0 +1,130 @@
+# meta_extractor.py
+import hashlib
+import json
+
+# Reads the title and every <meta> tag in one WebDriver round trip, in the shape
+# WebElement.get_attribute gave: Selenium returns the DOM property when one
+# exists, so a missing name or content is "" (meta.name, meta.content), while
+# property, charset and http-equiv have no property and come back as null.
+EXTRACT_META_JS = """
+return {
+    title: document.title,
+    meta_tags: Array.prototype.map.call(document.getElementsByTagName('meta'), function (meta) {
+        return {
+            name: meta.name,
+            property: meta.getAttribute('property'),
+            content: meta.content,
+            charset: meta.getAttribute('charset'),
+            http_equiv: meta.getAttribute('http-equiv')
+        };
+    })
+};
+"""
+
+# The same extraction as a standalone expression, for CDP Runtime.evaluate.
+EXTRACT_META_EXPRESSION = "(function () {" + EXTRACT_META_JS + "})()"
+
+# Resolves once <head> has seen no mutations for quietMs, or after timeoutMs.
+# Only mutations inside <head> (or the <head> element appearing) reset the
+# quiet timer, so busy SPA bodies do not keep the page "unsettled".
+QUIET_HEAD_FN = """
+function (quietMs, timeoutMs) {
+    return new Promise(function (resolve) {
+        var started = performance.now();
+        var mutations = 0, metaChanges = 0, lastMetaChange = -Infinity, quietTimer, deadline;
+        function inHead(node) {
+            for (; node; node = node.parentNode) {
+                if (node.nodeName === 'HEAD') { return true; }
+            }
+            return false;
+        }
+        function touchesMeta(record) {
+            var nodes = Array.prototype.slice.call(record.addedNodes)
+                .concat(Array.prototype.slice.call(record.removedNodes));
+            var target = record.target.nodeType === 1 ? record.target : record.target.parentNode;
+            return nodes.some(function (n) { return n.nodeName === 'META' || n.nodeName === 'TITLE' || n.nodeName === 'HEAD'; })
+                || (target && (target.nodeName === 'META' || target.nodeName === 'TITLE'));
+        }
+        function finish(settled) {
+            observer.disconnect();
+            clearTimeout(quietTimer);
+            clearTimeout(deadline);
+            var now = performance.now();
+            resolve({
+                settled: settled,
+                waited_ms: Math.round(now - started),
+                mutations: mutations,
+                meta_changes: metaChanges,
+                meta_changing: !settled && now - lastMetaChange < quietMs
+            });
+        }
+        function restartQuietTimer() {
+            clearTimeout(quietTimer);
+            quietTimer = setTimeout(function () { finish(true); }, quietMs);
+        }
+        var observer = new MutationObserver(function (records) {
+            var relevant = false;
+            records.forEach(function (record) {
+                var headAdded = Array.prototype.some.call(record.addedNodes, function (n) { return n.nodeName === 'HEAD'; });
+                if (!headAdded && !inHead(record.target)) { return; }
+                relevant = true;
+                mutations++;
+                if (touchesMeta(record)) {
+                    metaChanges++;
+                    lastMetaChange = performance.now();
+                }
+            });
+            if (relevant) { restartQuietTimer(); }
+        });
+        observer.observe(document.documentElement || document, {
+            childList: true, subtree: true, attributes: true, characterData: true
+        });
+        restartQuietTimer();
+        deadline = setTimeout(function () { finish(false); }, timeoutMs);
+    });
+}
+"""
+
+# WebDriver execute_async_script form: arguments are quietMs, timeoutMs, callback.
+WAIT_FOR_QUIET_HEAD_JS = (
+    "var done = arguments[arguments.length - 1];"
+    "(" + QUIET_HEAD_FN + ")(arguments[0], arguments[1]).then(done);"
+)
+
+META_FIELDS = ("name", "property", "content", "charset", "http_equiv")
+
+
+def build_meta_result(payload: dict) -> dict:
+    """Shape an extraction payload like scrape_all_meta_tags always has."""
+    meta_tags = []
+    for raw in payload.get("meta_tags") or []:
+        tag_info = {field: raw.get(field) for field in META_FIELDS}
+        if any(tag_info.values()):
+            meta_tags.append(tag_info)
+    return {
+        "title": payload.get("title") or "",
+        "meta_tags": meta_tags
+    }
+
+
+def head_hash(scraped: dict) -> str:
+    """Hash of the extracted title and meta tags, independent of tag order."""
+    tags = sorted(json.dumps(tag, sort_keys=True) for tag in scraped["meta_tags"])
+    payload = json.dumps({"title": scraped["title"], "meta_tags": tags}, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def quiet_head_expression(quiet_ms: int, timeout_ms: int) -> str:
+    """QUIET_HEAD_FN as a promise expression, for CDP Runtime.evaluate with awaitPromise."""
+    return f"({QUIET_HEAD_FN})({int(quiet_ms)}, {int(timeout_ms)})"
+
+
+def wait_for_quiet_head(driver, quiet_ms: int, timeout_ms: int) -> dict:
+    """Block until the driver's <head> stops changing; returns the readiness report."""
+    driver.set_script_timeout(timeout_ms / 1000 + 5)
+    return driver.execute_async_script(WAIT_FOR_QUIET_HEAD_JS, quiet_ms, timeout_ms)
+
+
+def extract_meta(driver) -> dict:
+    """Title and meta tags of the driver's current page."""
+    return build_meta_result(driver.execute_script(EXTRACT_META_JS))
@@ -2,18 +2,43 @@
 import aiohttp
 from fastapi import HTTPException
 
-async def run_pagespeed(url: str, api_key: str):
-    api_endpoint = 'https://www.googleapis.com/pagespeedonline/v5/runPagespeed'
+PAGESPEED_ENDPOINT = 'https://www.googleapis.com/pagespeedonline/v5/runPagespeed'
+
+def create_pagespeed_session(limit_per_host: int = 50, keepalive_timeout: float = 60.0,
+                             dns_cache_ttl: int = 300, timeout: float = 120.0) -> aiohttp.ClientSession:
+    """Build the app-lifetime session that keeps connections to the PageSpeed API warm."""
+    connector = aiohttp.TCPConnector(
+        limit=0,
+        limit_per_host=limit_per_host,
+        keepalive_timeout=keepalive_timeout,
+        ttl_dns_cache=dns_cache_ttl,
+    )
+    return aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=timeout))
+
+async def run_pagespeed(url: str, api_key: str, session: aiohttp.ClientSession = None,
+                        endpoint: str = PAGESPEED_ENDPOINT, strategy: str = None):
+    """Run PageSpeed Insights for a URL.
+
+    Pass the shared ``session`` to reuse its connections; without it a
+    one-off session is opened and closed around the call.
+    """
     params = {
         'url': url,
         'key': api_key
     }
+    if strategy:
+        params['strategy'] = strategy
+
+    if session is None:
+        async with aiohttp.ClientSession() as own_session:
+            return await _fetch_report(own_session, endpoint, params)
+    return await _fetch_report(session, endpoint, params)
 
-    async with aiohttp.ClientSession() as session:
-        async with session.get(api_endpoint, params=params) as response:
-            if response.status != 200:
-                raise HTTPException(
-                    status_code=response.status,
-                    detail=f"PageSpeed API error: {await response.text()}"
-                )
-            return await response.json()
+async def _fetch_report(session: aiohttp.ClientSession, endpoint: str, params: dict):
+    async with session.get(endpoint, params=params) as response:
+        if response.status != 200:
+            raise HTTPException(
+                status_code=response.status,
+                detail=f"PageSpeed API error: {await response.text()}"
+            )
+        return await response.json()
@@ -0,0 +1,113 @@
+# resource_blocking.py
+import json
+import re
+from urllib.parse import urlparse
+
+# CDP Network.ResourceType values still loaded while scraping. Only <head> is
+# read, so images, fonts and media are never needed.
+DEFAULT_ALLOWED_TYPES = ("Document", "Script", "XHR", "Fetch", "Stylesheet", "Manifest", "Other")
+
+# Network.setBlockedURLs can only match URLs, so the Selenium backend maps
+# resource types to file extensions and third-party scripts to known trackers.
+# Patterns match the whole URL, so extensions are anchored to the end of the
+# path; "*.webm*" would also block every page on www.webmd.com. Types such as
+# XHR and Fetch have no telltale URL and cannot be blocked there at all.
+TYPE_EXTENSIONS = {
+    "Image": ("png", "jpg", "jpeg", "gif", "webp", "avif", "svg", "ico"),
+    "Font": ("woff", "woff2", "ttf", "otf", "eot"),
+    "Media": ("mp4", "webm", "mp3", "m4a", "ogg", "m3u8"),
+    "Stylesheet": ("css",),
+    "Script": ("js", "mjs"),
+}
+TYPE_URL_PATTERNS = {
+    resource_type: tuple(pattern for ext in extensions for pattern in (f"*.{ext}", f"*.{ext}?*"))
+    for resource_type, extensions in TYPE_EXTENSIONS.items()
+}
+TRACKER_URL_PATTERNS = (
+    "*google-analytics.com/*",
+    "*googletagmanager.com/*",
+    "*doubleclick.net/*",
+    "*connect.facebook.net/*",
+    "*hotjar.com/*",
+    "*clarity.ms/*",
+    "*cdn.segment.com/*",
+)
+
+# Blocked requests never reach the network, so their size is unknown. Bytes
+# saved are estimated from typical transfer sizes per resource type.
+TYPICAL_TRANSFER_BYTES = {
+    "Image": 40 * 1024,
+    "Font": 30 * 1024,
+    "Media": 500 * 1024,
+    "Script": 25 * 1024,
+    "Stylesheet": 15 * 1024,
+}
+
+
+def _site(host: str) -> str:
+    """Last two labels of a host name, a cheap stand-in for the registrable domain."""
+    return ".".join((host or "").lower().split(".")[-2:])
+
+
+def _wildcard_match(pattern: str, url: str) -> bool:
+    """setBlockedURLs matching: ``*`` is the only wildcard."""
+    regex = ".*".join(re.escape(part) for part in pattern.split("*"))
+    return re.fullmatch(regex, url) is not None
+
+
+def new_network_counters() -> dict:
+    return {
+        "blocked_requests": 0,
+        "blocked_by_type": {},
+        "bytes_saved_estimate": 0,
+        "bytes_transferred": 0,
+    }
+
+
+def record_blocked(counters: dict, resource_type: str):
+    counters["blocked_requests"] += 1
+    counters["blocked_by_type"][resource_type] = counters["blocked_by_type"].get(resource_type, 0) + 1
+    counters["bytes_saved_estimate"] += TYPICAL_TRANSFER_BYTES.get(resource_type, 0)
+
+
+class ResourcePolicy:
+    """Which subresources a scraping browser may load."""
+
+    def __init__(self, allowed_types=DEFAULT_ALLOWED_TYPES, block_third_party_scripts: bool = True):
+        self.allowed_types = set(allowed_types)
+        self.block_third_party_scripts = block_third_party_scripts
+
+    def blocks(self, resource_type: str, request_url: str, page_url: str) -> bool:
+        if resource_type not in self.allowed_types:
+            return True
+        if resource_type == "Script" and self.block_third_party_scripts:
+            return _site(urlparse(request_url).hostname) != _site(urlparse(page_url).hostname)
+        return False
+
+    def blocked_url_patterns(self, page_url: str = None) -> list:
+        """setBlockedURLs patterns; any that would match ``page_url`` itself are left out."""
+        patterns = []
+        for resource_type, type_patterns in TYPE_URL_PATTERNS.items():
+            if resource_type not in self.allowed_types:
+                patterns.extend(type_patterns)
+        if self.block_third_party_scripts:
+            patterns.extend(TRACKER_URL_PATTERNS)
+        if page_url:
+            patterns = [pattern for pattern in patterns if not _wildcard_match(pattern, page_url)]
+        return patterns
+
+    def url_unblockable_types(self) -> list:
+        """Default types excluded here that blocked_url_patterns cannot express, so Selenium still loads them."""
+        return [t for t in DEFAULT_ALLOWED_TYPES if t not in self.allowed_types and t not in TYPE_URL_PATTERNS]
+
+
+def count_from_performance_log(entries, counters: dict):
+    """Fill network counters from a chromedriver performance log."""
+    for entry in entries:
+        message = json.loads(entry["message"])["message"]
+        method = message.get("method")
+        params = message.get("params", {})
+        if method == "Network.loadingFailed" and params.get("blockedReason"):
+            record_blocked(counters, params.get("type", "Other"))
+        elif method == "Network.loadingFinished":
+            counters["bytes_transferred"] += int(params.get("encodedDataLength", 0))
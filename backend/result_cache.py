@@ -0,0 +1,167 @@
+# result_cache.py
+import asyncio
+import json
+import logging
+import math
+import random
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+class _Entry:
+    __slots__ = ("value", "size", "stored_at", "expires_at", "compute_seconds")
+
+    def __init__(self, value, size: int, stored_at: float, expires_at: float, compute_seconds: float):
+        self.value = value
+        self.size = size
+        self.stored_at = stored_at
+        self.expires_at = expires_at
+        self.compute_seconds = compute_seconds
+
+
+class ResultCache:
+    """In-process TTL cache bounded by the total size of its values, evicting LRU first.
+
+    Sizes are the length of each value's compact JSON encoding, which tracks
+    the memory a cached API response holds far better than an entry count
+    when responses range from a few KB to over a MB.
+
+    For ``stale_grace`` seconds after expiry an entry is still served, marked
+    stale, while a single background task recomputes it. Fresh entries are
+    also refreshed early with a probability that rises as expiry nears and
+    with how long the value took to compute (XFetch), so hot keys that were
+    stored together do not all expire together.
+
+    With a ``single_flight``, concurrent misses for one key share a single
+    computation instead of each starting their own.
+    """
+
+    def __init__(self, max_bytes: int, ttl: float, stale_grace: float = 0.0, early_beta: float = 1.0,
+                 name: str = "OptiScrape", single_flight=None):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.stale_grace = stale_grace
+        self.early_beta = early_beta
+        self.name = name
+        self._single_flight = single_flight
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._refreshing = {}
+        self._stats = {
+            "hits": 0,
+            "stale_hits": 0,
+            "misses": 0,
+            "stores": 0,
+            "evictions": 0,
+            "expirations": 0,
+            "too_large": 0,
+            "early_refreshes": 0,
+            "refresh_failures": 0,
+        }
+
+    async def get_or_compute(self, key, compute):
+        """Return ``(value, cache_status)``, awaiting ``compute()`` only on a miss.
+
+        ``cache_status`` is an RFC 9211 Cache-Status value; stale hits carry a
+        negative ttl and ``detail=stale-while-revalidate``.
+        """
+        entry = self._lookup(key)
+        now = time.monotonic()
+        if entry is None:
+            self._stats["misses"] += 1
+            if self._single_flight is not None:
+                value = await self._single_flight.do(key, lambda: self._compute_and_store(key, compute))
+            else:
+                value = await self._compute_and_store(key, compute)
+            status = f"{self.name}; fwd=miss"
+            return value, status + "; stored" if key in self._entries else status
+
+        self._entries.move_to_end(key)
+        ttl = math.floor(entry.expires_at - now)
+        if now >= entry.expires_at:
+            self._stats["stale_hits"] += 1
+            self._refresh(key, compute)
+            return entry.value, f"{self.name}; hit; ttl={ttl}; detail=stale-while-revalidate"
+
+        self._stats["hits"] += 1
+        if self._expires_early(entry, now):
+            self._stats["early_refreshes"] += 1
+            self._refresh(key, compute)
+        return entry.value, f"{self.name}; hit; ttl={ttl}"
+
+    def peek(self, key):
+        """The cached value for ``key``, fresh or stale, or None; never computes or refreshes."""
+        entry = self._lookup(key)
+        return entry.value if entry is not None else None
+
+    def set(self, key, value, compute_seconds: float = 0.0) -> bool:
+        """Store ``value``; returns False when it alone is larger than the whole cache."""
+        size = len(json.dumps(value, separators=(",", ":")))
+        if size > self.max_bytes:
+            self._stats["too_large"] += 1
+            return False
+        if key in self._entries:
+            self._remove(key)
+        while self._bytes + size > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self._stats["evictions"] += 1
+        now = time.monotonic()
+        self._entries[key] = _Entry(value, size, now, now + self.ttl, compute_seconds)
+        self._bytes += size
+        self._stats["stores"] += 1
+        return True
+
+    def stats(self) -> dict:
+        stats = dict(self._stats)
+        lookups = stats["hits"] + stats["stale_hits"] + stats["misses"]
+        stats["hit_ratio"] = round((stats["hits"] + stats["stale_hits"]) / lookups, 3) if lookups else 0.0
+        stats["entries"] = len(self._entries)
+        stats["bytes"] = self._bytes
+        stats["max_bytes"] = self.max_bytes
+        stats["refreshing"] = len(self._refreshing)
+        return stats
+
+    def _lookup(self, key):
+        """The entry for ``key`` if it is fresh or within the stale grace window."""
+        entry = self._entries.get(key)
+        if entry is not None and time.monotonic() >= entry.expires_at + self.stale_grace:
+            self._remove(key)
+            self._stats["expirations"] += 1
+            return None
+        return entry
+
+    def _expires_early(self, entry: _Entry, now: float) -> bool:
+        if not self.early_beta or not entry.compute_seconds:
+            return False
+        # XFetch: -log(U) is exponentially distributed, so the refresh point
+        # lands earlier for slow-to-compute values and is jittered per request.
+        jitter = -entry.compute_seconds * self.early_beta * math.log(1.0 - random.random())
+        return now + jitter >= entry.expires_at
+
+    async def _compute_and_store(self, key, compute):
+        started = time.monotonic()
+        value = await compute()
+        self.set(key, value, time.monotonic() - started)
+        return value
+
+    def _refresh(self, key, compute):
+        if key in self._refreshing:
+            return
+        task = asyncio.create_task(self._compute_and_store(key, compute))
+        self._refreshing[key] = task
+        task.add_done_callback(lambda done: self._refresh_done(key, done))
+
+    def _refresh_done(self, key, task):
+        self._refreshing.pop(key, None)
+        if task.cancelled():
+            return
+        if task.exception() is not None:
+            self._stats["refresh_failures"] += 1
+            logger.warning("Background refresh of %r failed: %s", key, task.exception())
+
+    def _remove(self, key):
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
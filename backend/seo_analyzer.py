@@ -1,17 +1,37 @@
 # seo_analyzer.py
 import json
 import re
+import logging
+import httpx
 from fastapi import HTTPException
 from openai import AsyncOpenAI
 
+from json_stream import IncrementalJSONParser, MalformedJSON
+
+logger = logging.getLogger(__name__)
+
+AI_MODEL = "gpt-4-turbo-preview"
+
+def create_openai_client(api_key: str, max_connections: int = 20, max_keepalive: int = 10,
+                         timeout: float = 60.0, http2: bool = False) -> AsyncOpenAI:
+    """Build the long-lived OpenAI client whose connection pool is shared by all requests."""
+    http_client = httpx.AsyncClient(
+        limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_keepalive),
+        timeout=httpx.Timeout(timeout, connect=10.0),
+        http2=http2,
+    )
+    return AsyncOpenAI(api_key=api_key, http_client=http_client)
+
 def extract_json(text: str):
     """Extract JSON object from AI response."""
-    try:
-        match = re.search(r"\{[\s\S]*\}", text.strip())
-        if match:
-            return json.loads(match.group(0))
-    except json.JSONDecodeError:
-        pass
+    # Decode from the first brace rather than matching up to the last one,
+    # so prose after the object cannot make an otherwise valid reply fail.
+    match = re.search(r"\{", text)
+    if match:
+        try:
+            return json.JSONDecoder().raw_decode(text, match.start())[0]
+        except json.JSONDecodeError:
+            pass
     raise ValueError("No valid JSON found in AI response")
 
 def generate_preview_data(scraped_data: dict, categorized: dict) -> dict:
@@ -66,9 +86,8 @@ def generate_preview_data(scraped_data: dict, categorized: dict) -> dict:
     
     return preview
 
-async def analyze_meta_tags_with_openai(url: str, title: str, categorized: dict, api_key: str):
-    """Analyze SEO using OpenAI and return structured JSON."""
-    prompt = f"""
+def build_analysis_prompt(url: str, title: str, categorized: dict) -> str:
+    return f"""
     Analyze these meta tags for SEO effectiveness:
 
     Current URL: {url}
@@ -104,14 +123,69 @@ async def analyze_meta_tags_with_openai(url: str, title: str, categorized: dict,
     }}
     """
 
-    openai_client = AsyncOpenAI(api_key=api_key)
+async def analyze_meta_tags_with_openai(url: str, title: str, categorized: dict, api_key: str = None,
+                                        client: AsyncOpenAI = None):
+    """Analyze SEO using OpenAI and return structured JSON.
+
+    Pass the shared ``client`` to reuse its connections; without it a
+    throwaway client is built from ``api_key``.
+    """
+    openai_client = client or AsyncOpenAI(api_key=api_key)
 
     ai_response = await openai_client.chat.completions.create(
-        model="gpt-4-turbo-preview",
-        messages=[{"role": "user", "content": prompt}],
+        model=AI_MODEL,
+        messages=[{"role": "user", "content": build_analysis_prompt(url, title, categorized)}],
         temperature=0.2,
         response_format={"type": "json_object"}
     )
 
     ai_text = ai_response.choices[0].message.content
-    return extract_json(ai_text)
\ No newline at end of file
+    return extract_json(ai_text)
+
+async def stream_meta_tags_with_openai(url: str, title: str, categorized: dict, client: AsyncOpenAI,
+                                       retries: int = 1):
+    """Streaming variant of analyze_meta_tags_with_openai that yields sections as they complete.
+
+    Yields ``("field", path, value)`` for each top-level field and each
+    ``improvements`` section as soon as its closing token arrives, then
+    ``("result", None, analysis)`` with the whole object. The reply is parsed
+    while it streams, so malformed JSON is caught at the first bad token and
+    the request is abandoned there; truncated replies (stream ended or hit
+    the token limit) are caught at the end. Either is retried up to
+    ``retries`` times, announced by ``("retry", None, reason)``, after which
+    fields already yielded should be discarded.
+    """
+    prompt = build_analysis_prompt(url, title, categorized)
+    for attempt in range(retries + 1):
+        parser = IncrementalJSONParser(max_depth=2)
+        stream = await client.chat.completions.create(
+            model=AI_MODEL,
+            messages=[{"role": "user", "content": prompt}],
+            temperature=0.2,
+            response_format={"type": "json_object"},
+            stream=True,
+        )
+        try:
+            async for chunk in stream:
+                if not chunk.choices:
+                    continue
+                for path, value in parser.feed(chunk.choices[0].delta.content or ""):
+                    if path == ("improvements",):
+                        continue  # already sent section by section
+                    if len(path) == 1 or path[0] == "improvements":
+                        yield "field", ".".join(path), value
+            analysis = parser.close()
+        except MalformedJSON as e:
+            error = e
+        else:
+            error = None
+        finally:
+            # Stops generation server-side when we bail out early.
+            await stream.close()
+        if error is None:
+            yield "result", None, analysis
+            return
+        if attempt == retries:
+            raise ValueError(f"No valid JSON found in AI response: {error}") from error
+        logger.warning("Retrying AI analysis of %s (attempt %d): %s", url, attempt + 1, error)
+        yield "retry", None, str(error)
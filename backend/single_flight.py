@@ -0,0 +1,46 @@
+# single_flight.py
+import asyncio
+
+
+def retrieve_exception(task: asyncio.Task):
+    """Done callback marking a task's exception retrieved, for results nobody may await."""
+    if not task.cancelled():
+        task.exception()
+
+
+class SingleFlight:
+    """Coalesces concurrent calls for the same key into one in-flight task.
+
+    The first caller for a key starts the work; later callers await the same
+    task. Each caller awaits through ``asyncio.shield``, so a client that
+    disconnects cancels only its own wait, never the shared computation.
+    """
+
+    def __init__(self):
+        self._inflight = {}
+        self._stats = {"started": 0, "coalesced": 0}
+
+    async def do(self, key, fn):
+        """Return the result of ``fn()``, sharing one run among concurrent callers of ``key``."""
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._finished(key, done))
+            self._stats["started"] += 1
+        else:
+            self._stats["coalesced"] += 1
+        return await asyncio.shield(task)
+
+    def running(self, key) -> bool:
+        return key in self._inflight
+
+    def stats(self) -> dict:
+        stats = dict(self._stats)
+        stats["in_flight"] = len(self._inflight)
+        return stats
+
+    def _finished(self, key, task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        retrieve_exception(task)
@@ -0,0 +1,244 @@
+# site_crawler.py
+import asyncio
+import logging
+import time
+import zlib
+from contextlib import asynccontextmanager
+from html.parser import HTMLParser
+from urllib.parse import urljoin, urlsplit
+from urllib.robotparser import RobotFileParser
+
+import aiohttp
+
+from bloom_filter import BloomFilter
+from static_fetcher import USER_AGENT, CHUNK_SIZE, _decoder_for, close_unread
+
+logger = logging.getLogger(__name__)
+
+# Product token matched against robots.txt User-agent lines
+ROBOTS_AGENT = "OptiScrape"
+_DONE = object()
+
+
+class LinkParser(HTMLParser):
+    """Collects followable links from an HTML document fed in pieces."""
+
+    def __init__(self, base_url: str):
+        super().__init__(convert_charrefs=True)
+        self.base_url = base_url
+        self.links = []
+        self.nofollow = False
+
+    def handle_starttag(self, tag, attrs):
+        attributes = dict(attrs)
+        if tag == "base" and attributes.get("href"):
+            self.base_url = urljoin(self.base_url, attributes["href"])
+        elif tag == "meta" and (attributes.get("name") or "").lower() in ("robots", ROBOTS_AGENT.lower()):
+            if "nofollow" in (attributes.get("content") or "").lower():
+                self.nofollow = True
+        elif tag == "a" and attributes.get("href"):
+            if "nofollow" not in (attributes.get("rel") or "").lower().split():
+                self.links.append(urljoin(self.base_url, attributes["href"].strip()))
+
+
+def _same_site(host: str, site: str) -> bool:
+    return host == site or host.removeprefix("www.") == site.removeprefix("www.")
+
+
+class _Host:
+    """Per-host politeness: at most ``limit`` fetches at once, ``delay`` seconds apart."""
+
+    def __init__(self, limit: int):
+        self.semaphore = asyncio.Semaphore(limit)
+        self.lock = asyncio.Lock()
+        self.next_at = 0.0
+
+    async def wait_turn(self, delay: float):
+        async with self.lock:
+            now = time.monotonic()
+            if self.next_at > now:
+                await asyncio.sleep(self.next_at - now)
+            self.next_at = time.monotonic() + delay
+
+
+class SiteCrawler:
+    """Discovers a site's pages by following links from a start URL.
+
+    Pages on the start URL's host (with or without ``www.``) are fetched by
+    ``concurrency`` workers from an async frontier, at most ``per_host`` at
+    a time per host and ``crawl_delay`` seconds apart, or slower if
+    robots.txt asks for it. robots.txt is fetched once per host and obeyed.
+    Seen URLs go into a Bloom filter sized for ``seen_capacity``, so the
+    memory spent on dedupe is fixed up front however large the site is.
+
+    ``urls()`` yields each successfully fetched HTML page as it is found,
+    through a bounded queue, so discovery pauses while the consumer is busy.
+    """
+
+    def __init__(self, session: aiohttp.ClientSession, canonicalize, max_pages: int = 1000, max_depth: int = 5,
+                 concurrency: int = 4, per_host: int = 2, crawl_delay: float = 0.5,
+                 seen_capacity: int = 1_000_000, seen_error_rate: float = 0.001,
+                 max_bytes: int = 2 * 1024 * 1024, timeout: float = 15.0, queue_size: int = 64):
+        self.session = session
+        self.canonicalize = canonicalize
+        self.max_pages = max_pages
+        self.max_depth = max_depth
+        self.concurrency = concurrency
+        self.per_host = per_host
+        self.crawl_delay = crawl_delay
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        self.queue_size = queue_size
+        self._seen = BloomFilter(seen_capacity, seen_error_rate)
+        self._hosts = {}
+        self._robots = {}
+        self._stats = {"queued": 0, "fetched": 0, "pages": 0, "robots_blocked": 0, "errors": 0, "not_html": 0}
+
+    def stats(self) -> dict:
+        stats = dict(self._stats)
+        stats["seen_filter_bytes"] = self._seen.nbytes
+        stats["robots_cached"] = len(self._robots)
+        return stats
+
+    async def urls(self, start_url: str):
+        """Yield the canonical URL of each crawled page."""
+        site = urlsplit(start_url).hostname or ""
+        frontier = asyncio.Queue()
+        found = asyncio.Queue(maxsize=self.queue_size)
+        outstanding = 0
+
+        def enqueue(url: str, depth: int):
+            nonlocal outstanding
+            if self._stats["queued"] >= self.max_pages:
+                return
+            try:
+                url = self.canonicalize(url)
+            except ValueError:
+                return
+            parts = urlsplit(url)
+            if parts.scheme not in ("http", "https") or not _same_site(parts.hostname or "", site):
+                return
+            if not self._seen.add(url):
+                return
+            self._stats["queued"] += 1
+            outstanding += 1
+            frontier.put_nowait((url, depth))
+
+        async def worker():
+            nonlocal outstanding
+            while True:
+                url, depth = await frontier.get()
+                try:
+                    links = await self._visit(url, depth < self.max_depth)
+                    if links is not None:
+                        self._stats["pages"] += 1
+                        await found.put(url)
+                        for link in links:
+                            enqueue(link, depth + 1)
+                except Exception as e:
+                    self._stats["errors"] += 1
+                    logger.warning("Crawling %s failed: %s", url, e)
+                outstanding -= 1
+                if outstanding == 0:
+                    await found.put(_DONE)
+
+        enqueue(start_url, 0)
+        if not outstanding:
+            return
+        tasks = [asyncio.create_task(worker()) for _ in range(self.concurrency)]
+        try:
+            while (url := await found.get()) is not _DONE:
+                yield url
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _visit(self, url: str, follow: bool):
+        """Fetch ``url`` politely; returns its links ([] if not following), or None if it is no page."""
+        robots = await self._robots_for(url)
+        if not robots.can_fetch(ROBOTS_AGENT, url):
+            self._stats["robots_blocked"] += 1
+            return None
+        async with self.polite(url):
+            return await self._fetch_links(url, follow)
+
+    @asynccontextmanager
+    async def polite(self, url: str):
+        """Hold ``url``'s host slot, after its crawl delay, for a request to that host.
+
+        The crawler's own fetches go through it, and so should anything else
+        fetching the crawled pages, such as their analysis.
+        """
+        robots = await self._robots_for(url)
+        delay = max(self.crawl_delay, robots.crawl_delay(ROBOTS_AGENT) or 0)
+        slot = self._hosts.setdefault(urlsplit(url).netloc, _Host(self.per_host))
+        async with slot.semaphore:
+            await slot.wait_turn(delay)
+            yield
+
+    async def _fetch_links(self, url: str, follow: bool):
+        async with self.session.get(
+            url,
+            headers={"User-Agent": USER_AGENT, "Accept": "text/html,application/xhtml+xml", "Accept-Encoding": "gzip"},
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+        ) as response:
+            try:
+                self._stats["fetched"] += 1
+                if response.status != 200:
+                    return None
+                if "html" not in response.content_type:
+                    self._stats["not_html"] += 1
+                    return None
+                if not follow:
+                    return []
+                return await self._parse_links(response)
+            finally:
+                close_unread(response)
+
+    async def _parse_links(self, response) -> list:
+        gzipped = response.headers.get("Content-Encoding", "").lower() == "gzip"
+        inflater = zlib.decompressobj(16 + zlib.MAX_WBITS) if gzipped else None
+        decoder = _decoder_for(response.charset)
+        parser = LinkParser(str(response.url))
+        bytes_read = 0
+        async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+            bytes_read += len(chunk)
+            parser.feed(decoder.decode(inflater.decompress(chunk) if inflater else chunk))
+            if parser.nofollow or bytes_read >= self.max_bytes:
+                break
+        else:
+            parser.close()
+        return [] if parser.nofollow else parser.links
+
+    async def _robots_for(self, url: str) -> RobotFileParser:
+        parts = urlsplit(url)
+        origin = f"{parts.scheme}://{parts.netloc}"
+        if origin not in self._robots:
+            # Cache the task, not the result, so concurrent first visits share one fetch.
+            self._robots[origin] = asyncio.ensure_future(self._fetch_robots(origin))
+        return await asyncio.shield(self._robots[origin])
+
+    async def _fetch_robots(self, origin: str) -> RobotFileParser:
+        robots = RobotFileParser(origin + "/robots.txt")
+        try:
+            async with self.session.get(
+                robots.url,
+                headers={"User-Agent": USER_AGENT, "Accept-Encoding": "gzip"},
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+            ) as response:
+                status = response.status
+                body = await response.read() if status < 300 else b""
+                if body and response.headers.get("Content-Encoding", "").lower() == "gzip":
+                    body = zlib.decompress(body, 16 + zlib.MAX_WBITS)
+        except (aiohttp.ClientError, asyncio.TimeoutError, zlib.error) as e:
+            logger.warning("Fetching %s failed, not crawling %s: %s", robots.url, origin, e)
+            status = 503
+        # RFC 9309: 4xx means no restrictions; 5xx or unreachable means assume full disallow.
+        if status >= 500:
+            robots.disallow_all = True
+        elif status >= 400:
+            robots.allow_all = True
+        else:
+            robots.parse(body.decode("utf-8", errors="replace").splitlines())
+        return robots
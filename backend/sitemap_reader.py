@@ -0,0 +1,207 @@
+# sitemap_reader.py
+import asyncio
+import logging
+import xml.etree.ElementTree as ET
+import zlib
+
+import aiohttp
+
+from static_fetcher import USER_AGENT, CHUNK_SIZE, close_unread
+
+logger = logging.getLogger(__name__)
+
+GZIP_MAGIC = b"\x1f\x8b"
+_DONE = object()
+
+
+class SitemapError(Exception):
+    pass
+
+
+class _Inflater:
+    """Undoes Content-Encoding and, for .xml.gz files, the gzip container under it."""
+
+    def __init__(self, content_encoding: str):
+        self._layers = []
+        if content_encoding.lower() in ("gzip", "x-gzip", "deflate"):
+            # wbits=47 accepts both gzip and zlib headers.
+            self._layers.append(zlib.decompressobj(32 + zlib.MAX_WBITS))
+        self._sniff = b""
+
+    def feed(self, data: bytes) -> bytes:
+        for layer in self._layers:
+            data = layer.decompress(data)
+        if self._sniff is not None:
+            self._sniff += data
+            if len(self._sniff) < len(GZIP_MAGIC):
+                return b""
+            data, self._sniff = self._sniff, None
+            if data.startswith(GZIP_MAGIC):
+                self._layers.append(zlib.decompressobj(16 + zlib.MAX_WBITS))
+                data = self._layers[-1].decompress(data)
+        return data
+
+    def flush(self) -> bytes:
+        data = self._sniff or b""
+        for layer in self._layers:
+            data = layer.decompress(data) + layer.flush()
+        return data
+
+
+def _local_name(tag: str) -> str:
+    return tag.rpartition("}")[2]
+
+
+def _child_text(elem, name: str):
+    for child in elem:
+        if _local_name(child.tag) == name:
+            return (child.text or "").strip() or None
+    return None
+
+
+class SitemapReader:
+    """Streams (url, lastmod) pairs out of a sitemap or sitemap index.
+
+    Each document is parsed incrementally with XMLPullParser while it
+    downloads, and every finished <url> or <sitemap> element is cleared from
+    the tree, so memory stays flat however large a sitemap is. Nested
+    indexes are fetched by ``concurrency`` tasks at once, up to ``max_depth``
+    levels deep. Page URLs are deduplicated by their ``canonicalize`` form.
+
+    The output queue is bounded: when the consumer falls behind, fetching
+    pauses. A failing root sitemap raises SitemapError; failing nested ones
+    are logged and counted in ``stats()``.
+    """
+
+    def __init__(self, session: aiohttp.ClientSession, canonicalize, concurrency: int = 4, max_depth: int = 3,
+                 max_bytes: int = 50 * 1024 * 1024, timeout: float = 30.0, queue_size: int = 256):
+        self.session = session
+        self.canonicalize = canonicalize
+        self.concurrency = concurrency
+        self.max_depth = max_depth
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        self.queue_size = queue_size
+        self._stats = {"sitemaps": 0, "urls": 0, "duplicates": 0, "invalid": 0, "errors": 0}
+
+    def stats(self) -> dict:
+        return dict(self._stats)
+
+    async def urls(self, sitemap_url: str, limit: int = None):
+        """Yield ``(url, lastmod)`` for each distinct page, as soon as it is parsed."""
+        sitemaps = asyncio.Queue()
+        found = asyncio.Queue(maxsize=self.queue_size)
+        seen_sitemaps = {sitemap_url}
+        seen_pages = set()
+        outstanding = 1
+
+        async def on_sitemap(loc: str, depth: int):
+            nonlocal outstanding
+            if depth > self.max_depth or loc in seen_sitemaps:
+                return
+            seen_sitemaps.add(loc)
+            outstanding += 1
+            sitemaps.put_nowait((loc, depth))
+
+        async def on_page(loc: str, lastmod):
+            try:
+                key = self.canonicalize(loc)
+            except ValueError:
+                self._stats["invalid"] += 1
+                return
+            if key in seen_pages:
+                self._stats["duplicates"] += 1
+                return
+            seen_pages.add(key)
+            self._stats["urls"] += 1
+            await found.put((loc, lastmod))
+
+        async def fetcher():
+            nonlocal outstanding
+            while True:
+                loc, depth = await sitemaps.get()
+                try:
+                    await self._read(loc, depth, on_sitemap, on_page)
+                except Exception as e:
+                    if depth == 0:
+                        await found.put(SitemapError(f"Reading sitemap {loc} failed: {e}"))
+                        return
+                    self._stats["errors"] += 1
+                    logger.warning("Skipping nested sitemap %s: %s", loc, e)
+                outstanding -= 1
+                if outstanding == 0:
+                    await found.put(_DONE)
+
+        sitemaps.put_nowait((sitemap_url, 0))
+        tasks = [asyncio.create_task(fetcher()) for _ in range(self.concurrency)]
+        try:
+            yielded = 0
+            while limit is None or yielded < limit:
+                item = await found.get()
+                if item is _DONE:
+                    break
+                if isinstance(item, SitemapError):
+                    raise item
+                yield item
+                yielded += 1
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _read(self, url: str, depth: int, on_sitemap, on_page):
+        async with self.session.get(
+            url,
+            headers={"User-Agent": USER_AGENT, "Accept-Encoding": "gzip"},
+            # Only connecting is bounded by the session: while the consumer
+            # applies backpressure the body legitimately sits unread.
+            timeout=aiohttp.ClientTimeout(total=None, sock_connect=self.timeout),
+        ) as response:
+            if response.status != 200:
+                raise SitemapError(f"HTTP {response.status}")
+            self._stats["sitemaps"] += 1
+            try:
+                await self._parse(response, depth, on_sitemap, on_page)
+            except BaseException:
+                close_unread(response)
+                raise
+
+    async def _parse(self, response, depth: int, on_sitemap, on_page):
+        inflater = _Inflater(response.headers.get("Content-Encoding", ""))
+        parser = ET.XMLPullParser(events=("start", "end"))
+        state = {"root": None, "bytes": 0}
+        while True:
+            # asyncio.timeout rather than wait_for, which on 3.11 can swallow
+            # a cancel that lands as the read completes.
+            async with asyncio.timeout(self.timeout):
+                chunk = await response.content.read(CHUNK_SIZE)
+            data = inflater.feed(chunk) if chunk else inflater.flush()
+            state["bytes"] += len(data)
+            if state["bytes"] > self.max_bytes:
+                raise SitemapError(f"larger than {self.max_bytes} bytes")
+            parser.feed(data)
+            await self._handle_events(parser, state, depth, on_sitemap, on_page)
+            if not chunk:
+                break
+        parser.close()
+        await self._handle_events(parser, state, depth, on_sitemap, on_page)
+
+    async def _handle_events(self, parser, state: dict, depth: int, on_sitemap, on_page):
+        for event, elem in parser.read_events():
+            if event == "start":
+                if state["root"] is None:
+                    state["root"] = elem
+                continue
+            name = _local_name(elem.tag)
+            if name not in ("url", "sitemap"):
+                continue
+            loc = _child_text(elem, "loc")
+            lastmod = _child_text(elem, "lastmod")
+            # Drop finished entries so the tree never holds more than one.
+            state["root"].clear()
+            if not loc:
+                continue
+            if name == "sitemap":
+                await on_sitemap(loc, depth + 1)
+            else:
+                await on_page(loc, lastmod)
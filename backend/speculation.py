@@ -0,0 +1,73 @@
+# speculation.py
+import asyncio
+import time
+
+from meta_extractor import head_hash
+from single_flight import retrieve_exception
+
+
+def new_speculation_stats() -> dict:
+    return {"started": 0, "used": 0, "discarded": 0, "saved_ms_total": 0}
+
+
+class Speculation:
+    """AI analysis started on the settled <head> while the browser is still busy.
+
+    ``start`` is handed the head once it is quiet and launches
+    ``analyze(scraped)`` in the background, overlapping the driver reset and
+    release. ``result`` is then given the returned scrape: if its head hashes
+    the same, the speculative task is awaited (often already finished);
+    otherwise it is cancelled and ``analyze`` runs again on that head.
+    ``saved_ms`` is how much of the AI call overlapped the rest of the scrape.
+    """
+
+    def __init__(self, analyze, stats: dict):
+        self.analyze = analyze
+        self.stats = stats
+        self.outcome = None
+        self.saved_ms = 0
+        self._task = None
+        self._hash = None
+        self._started = None
+        self._finished = None
+        self._cancelled = False
+
+    def start(self, scraped: dict):
+        if self._task is not None or self._cancelled:
+            return
+        self._hash = head_hash(scraped)
+        self._started = time.perf_counter()
+        self._task = asyncio.ensure_future(self.analyze(scraped))
+        self._task.add_done_callback(self._done)
+        self.stats["started"] += 1
+
+    async def result(self, scraped: dict):
+        """The AI analysis of the final ``scraped`` head."""
+        if self._task is None:
+            return await self.analyze(scraped)
+        if head_hash(scraped) != self._hash:
+            self.cancel()
+            self.outcome = "discarded"
+            self.stats["discarded"] += 1
+            return await self.analyze(scraped)
+
+        ready = time.perf_counter()
+        analysis = await self._task
+        # Without speculation the call would have started at ``ready``.
+        self.saved_ms = round((min(ready, self._finished) - self._started) * 1000)
+        self.outcome = "used"
+        self.stats["used"] += 1
+        self.stats["saved_ms_total"] += self.saved_ms
+        return analysis
+
+    def cancel(self):
+        self._cancelled = True
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+
+    def report(self) -> dict:
+        return {"outcome": self.outcome, "saved_ms": self.saved_ms}
+
+    def _done(self, task):
+        self._finished = time.perf_counter()
+        retrieve_exception(task)
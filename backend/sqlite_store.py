@@ -0,0 +1,34 @@
+# sqlite_store.py
+import sqlite3
+import threading
+
+
+class SQLiteStore:
+    """One WAL-mode SQLite connection shared behind a lock.
+
+    Subclasses set ``schema`` and run their queries in worker threads, taking
+    ``_lock`` around every use of ``_db``.
+    """
+
+    schema = ""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = None
+
+    def open(self):
+        self._db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(self.schema)
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    def _execute(self, sql: str, params=()) -> int:
+        with self._lock:
+            return self._db.execute(sql, params).rowcount
@@ -0,0 +1,194 @@
+# static_fetcher.py
+import codecs
+import zlib
+from html.parser import HTMLParser
+
+import aiohttp
+
+from meta_extractor import build_meta_result
+
+USER_AGENT = "Mozilla/5.0 (compatible; OptiScrape/1.0; +https://optiscrape.onrender.com)"
+CHUNK_SIZE = 16 * 1024
+
+# Client-side rendered apps ship an empty mount element such as
+# <div id="root"></div>, often with a <noscript> asking for JavaScript.
+SPA_ROOT_IDS = {"root", "app", "__next", "__nuxt", "___gatsby", "svelte"}
+# Those markers sit at the top of <body>, so this much is read past the head
+BODY_PEEK_BYTES = 8 * 1024
+
+
+class HeadParser(HTMLParser):
+    """Collects the title and meta tags of an HTML document fed in pieces."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.title_parts = []
+        self.meta_tags = []
+        self.spa_markers = set()
+        self.head_done = False
+        self._in_title = False
+        self._noscript_parts = None
+        self._empty_mount = None
+
+    def handle_starttag(self, tag, attrs):
+        attributes = dict(attrs)
+        self._empty_mount = None
+        if attributes.get("id") in SPA_ROOT_IDS:
+            self._empty_mount = (tag, attributes["id"])
+        if tag == "body":
+            self.head_done = True
+        elif tag == "noscript":
+            self._noscript_parts = []
+        if self.head_done:
+            return
+        if tag == "title":
+            self._in_title = True
+        elif tag == "meta":
+            self.meta_tags.append({
+                "name": attributes.get("name"),
+                "property": attributes.get("property"),
+                "content": attributes.get("content"),
+                "charset": attributes.get("charset"),
+                "http_equiv": attributes.get("http-equiv")
+            })
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        if self._empty_mount and self._empty_mount[0] == tag:
+            self.spa_markers.add(f"empty #{self._empty_mount[1]}")
+        self._empty_mount = None
+        if tag == "head":
+            self.head_done = True
+        elif tag == "title":
+            self._in_title = False
+        elif tag == "noscript" and self._noscript_parts is not None:
+            if "javascript" in "".join(self._noscript_parts).lower():
+                self.spa_markers.add("noscript JavaScript notice")
+            self._noscript_parts = None
+
+    def handle_data(self, data):
+        if data.strip():
+            self._empty_mount = None
+        if self._in_title and not self.head_done:
+            self.title_parts.append(data)
+        elif self._noscript_parts is not None:
+            self._noscript_parts.append(data)
+
+    def result(self) -> dict:
+        # document.title collapses whitespace, so do the same here.
+        title = " ".join("".join(self.title_parts).split())
+        return build_meta_result({"title": title, "meta_tags": self.meta_tags})
+
+
+def client_rendered_reason(scraped: dict, spa_markers) -> str:
+    """Why a static result probably needs a real browser, or '' if it looks complete."""
+    if not scraped["title"]:
+        return "empty title"
+    if not any((tag.get("property") or "").lower().startswith("og:") for tag in scraped["meta_tags"]):
+        return "no OpenGraph tags"
+    if spa_markers:
+        return "SPA markers: " + ", ".join(sorted(spa_markers))
+    return ""
+
+
+def _decoder_for(charset: str):
+    try:
+        return codecs.getincrementaldecoder(charset or "utf-8")(errors="replace")
+    except LookupError:
+        return codecs.getincrementaldecoder("utf-8")(errors="replace")
+
+
+def close_unread(response: aiohttp.ClientResponse):
+    """Drop the connection of a response whose body was not read to the end.
+
+    Closing instead of releasing drops the unread body on the floor, rather
+    than leaving it queued on a connection that goes back to the pool.
+    """
+    if not response.content.at_eof():
+        response.close()
+
+
+async def fetch_static_meta(session: aiohttp.ClientSession, url: str, timeout: float = 10.0,
+                            max_bytes: int = 512 * 1024, validators: dict = None,
+                            body_peek_bytes: int = BODY_PEEK_BYTES) -> dict:
+    """Fetch a page over plain HTTP and parse its <head> without a browser.
+
+    The body is streamed into the parser and the connection is dropped once
+    the head is done, or after ``max_bytes`` on the wire. A head that looks
+    complete is only trusted after up to ``body_peek_bytes`` more have been
+    read looking for the SPA markers at the top of <body>, so the check does
+    not depend on where the network split the response.
+    The session must not decompress responses itself (auto_decompress=False)
+    so that ``bytes_read`` counts wire bytes, comparable to Content-Length.
+
+    Returns the scrape_all_meta_tags result plus ``fallback_reason``, which is
+    non-empty when the page should be rendered in Chrome instead, a
+    ``transfer`` dict with the byte accounting and the response's
+    ``validators`` (ETag and Last-Modified). Given stored ``validators`` the
+    request is conditional, and a 304 comes back as ``not_modified`` with
+    no meta tags.
+    """
+    headers = {
+        "User-Agent": USER_AGENT,
+        "Accept": "text/html,application/xhtml+xml",
+        "Accept-Encoding": "gzip",
+    }
+    if validators and validators.get("etag"):
+        headers["If-None-Match"] = validators["etag"]
+    if validators and validators.get("last_modified"):
+        headers["If-Modified-Since"] = validators["last_modified"]
+    async with session.get(url, headers=headers, timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+        transfer = {"bytes_read": 0, "content_length": response.content_length, "stopped_at": "eof"}
+        response_validators = {
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+        }
+        if response.status == 304:
+            # A 304 need not repeat the validators it matched.
+            for key, value in (validators or {}).items():
+                response_validators[key] = response_validators.get(key) or value
+            return {"title": "", "meta_tags": [], "fallback_reason": "", "not_modified": True,
+                    "validators": response_validators, "transfer": transfer}
+        if response.status != 200:
+            response.close()
+            return {"title": "", "meta_tags": [], "fallback_reason": f"HTTP {response.status}",
+                    "validators": response_validators, "transfer": transfer}
+        if "html" not in response.content_type:
+            response.close()
+            return {"title": "", "meta_tags": [], "fallback_reason": f"content type {response.content_type}",
+                    "validators": response_validators, "transfer": transfer}
+
+        gzipped = response.headers.get("Content-Encoding", "").lower() == "gzip"
+        inflater = zlib.decompressobj(16 + zlib.MAX_WBITS) if gzipped else None
+        decoder = _decoder_for(response.charset)
+        parser = HeadParser()
+        peek_until = None
+        async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+            transfer["bytes_read"] += len(chunk)
+            if inflater:
+                chunk = inflater.decompress(chunk)
+            parser.feed(decoder.decode(chunk))
+            if parser.head_done and peek_until is None:
+                # A head that already fails the check needs no look at <body>.
+                complete = not client_rendered_reason(parser.result(), ())
+                peek_until = transfer["bytes_read"] + body_peek_bytes if complete else 0
+            if peek_until is not None and (parser.spa_markers or transfer["bytes_read"] >= peek_until):
+                transfer["stopped_at"] = "head_end"
+                break
+            if transfer["bytes_read"] >= max_bytes:
+                transfer["stopped_at"] = "byte_cap"
+                break
+        close_unread(response)
+
+    parser.close()
+    scraped = parser.result()
+    if transfer["stopped_at"] == "byte_cap":
+        scraped["fallback_reason"] = f"<head> larger than {max_bytes} bytes"
+    else:
+        scraped["fallback_reason"] = client_rendered_reason(scraped, parser.spa_markers)
+    scraped["validators"] = response_validators
+    scraped["transfer"] = transfer
+    return scraped
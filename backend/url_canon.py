@@ -0,0 +1,109 @@
+# url_canon.py
+import re
+from urllib.parse import quote, unquote_plus, urlsplit, urlunsplit
+
+import idna
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+# Query parameters that identify a campaign or click, not a page. A trailing
+# "*" matches by prefix.
+DEFAULT_TRACKING_PARAMS = (
+    "utm_*",
+    "gclid", "dclid", "gbraid", "wbraid", "gclsrc",
+    "fbclid", "msclkid", "yclid", "twclid", "ttclid", "igshid",
+    "mc_cid", "mc_eid", "_ga", "_gl", "_hsenc", "_hsmi", "mkt_tok",
+)
+
+# Already-canonical URLs (lowercase ASCII host, no port, query, fragment,
+# percent-escapes or dot segments) skip parsing entirely.
+_FAST_PATH = re.compile(r"https?://[a-z0-9-]+(?:\.[a-z0-9-]+)*(?:/[A-Za-z0-9\-._~/]*)?")
+_PERCENT_ESCAPE = re.compile(r"%([0-9A-Fa-f]{2})")
+_UNRESERVED = frozenset("ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-._~")
+_PATH_SAFE = "/%:@!$&'()*+,;=-._~"
+_QUERY_SAFE = "/?%:@!$'()*+,;=-._~"
+
+
+def _normalize_escape(match) -> str:
+    char = chr(int(match.group(1), 16))
+    return char if char in _UNRESERVED else "%" + match.group(1).upper()
+
+
+def _remove_dot_segments(path: str) -> str:
+    output = []
+    for segment in path.split("/"):
+        if segment == "..":
+            if len(output) > 1:
+                output.pop()
+        elif segment != ".":
+            output.append(segment)
+    if path.endswith(("/.", "/..")):
+        output.append("")
+    return "/".join(output) or "/"
+
+
+def _ascii_host(host: str) -> str:
+    if host.isascii():
+        return host
+    try:
+        return idna.encode(host, uts46=True).decode("ascii")
+    except idna.IDNAError:
+        try:
+            return host.encode("idna").decode("ascii")
+        except UnicodeError:
+            raise ValueError(f"Host {host!r} cannot be IDNA-encoded") from None
+
+
+class UrlCanonicalizer:
+    """Maps spelling variants of a URL to one canonical form for cache keys and dedupe.
+
+    Lowercases scheme and host, converts IDNs to punycode, drops default
+    ports and fragments, normalizes percent-escapes and dot segments, removes
+    tracking parameters and sorts the remaining query parameters by name.
+    """
+
+    def __init__(self, tracking_params=DEFAULT_TRACKING_PARAMS):
+        self._tracking_exact = frozenset(p.lower() for p in tracking_params if not p.endswith("*"))
+        self._tracking_prefixes = tuple(p[:-1].lower() for p in tracking_params if p.endswith("*"))
+
+    def canonicalize(self, url: str) -> str:
+        if _FAST_PATH.fullmatch(url) and "/." not in url:
+            return url if url.count("/") > 2 else url + "/"
+        return self._canonicalize_slow(url)
+
+    def is_tracking_param(self, name: str) -> bool:
+        name = name.lower()
+        return name in self._tracking_exact or name.startswith(self._tracking_prefixes)
+
+    def _canonicalize_slow(self, url: str) -> str:
+        parts = urlsplit(url.strip())
+        scheme = parts.scheme.lower()
+        host = _ascii_host(parts.hostname or "").rstrip(".")
+        if not host:
+            raise ValueError(f"URL has no host: {url!r}")
+        if ":" in host:
+            host = f"[{host}]"
+        netloc = host
+        if parts.username is not None:
+            userinfo = parts.username if parts.password is None else f"{parts.username}:{parts.password}"
+            netloc = f"{userinfo}@{host}"
+        port = parts.port
+        if port is not None and port != DEFAULT_PORTS.get(scheme):
+            netloc += f":{port}"
+
+        path = quote(parts.path, safe=_PATH_SAFE)
+        path = _remove_dot_segments(_PERCENT_ESCAPE.sub(_normalize_escape, path))
+
+        # Parameters are kept as written (no "=" added to "?flag", "%20" not
+        # turned into "+"), since the canonical URL is also the one fetched.
+        params = []
+        for param in parts.query.split("&"):
+            if param and not self.is_tracking_param(unquote_plus(param.partition("=")[0])):
+                params.append(_PERCENT_ESCAPE.sub(_normalize_escape, quote(param, safe=_QUERY_SAFE)))
+        # Sorted on the name only, and stably, so repeated names such as
+        # "a=2&a=1" keep their order; their values may mean different things.
+        query = "&".join(sorted(params, key=lambda p: p.split("=", 1)[0]))
+        return urlunsplit((scheme, netloc, path, query, ""))
+
+
+canonicalize_url = UrlCanonicalizer().canonicalize
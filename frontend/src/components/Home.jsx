@@ -81,7 +81,24 @@ const OptiScrapeHome = () => {
         setPageSpeed(null);
 
         try {
-            if (checks.seoAnalyzer) {
+            if (checks.seoAnalyzer && checks.pageSpeed) {
+                // One request: the server runs both concurrently
+                const reportResponse = await axios.get(`https://optiscrape.onrender.com/report`, {
+                    params: { url },
+                    headers: {
+                        'Content-Type': 'application/json',
+                        'ngrok-skip-browser-warning': 'true', // Bypass ngrok warning
+                        'Access-Control-Allow-Origin': '*' // For CORS }
+                    }
+                });
+                const report = reportResponse.data;
+                setSeo(report.seo);
+                setPageSpeed(report.pagespeed);
+                const failed = Object.values(report.errors || {});
+                if (failed.length > 0) {
+                    setError(failed.map(e => e.detail).join("; "));
+                }
+            } else if (checks.seoAnalyzer) {
                 const seoResponse = await axios.get(`https://optiscrape.onrender.com/analyze`, {
                     params: { url },
                     headers: {
@@ -91,9 +108,7 @@ const OptiScrapeHome = () => {
                     }
                 });
                 setSeo(seoResponse.data);
-            }
-
-            if (checks.pageSpeed) {
+            } else {
                 const speedResponse = await axios.get(`https://optiscrape.onrender.com/pagespeed`, {
                     params: { url },
                     headers: {